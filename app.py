@@ -5,21 +5,267 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 import io
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import StaticPool
 import tempfile
 import os
-from helper.gen_sql_chunk import create_sqlite_file_directly
+import hashlib
+import re
+import shutil
+import functools
+from collections import deque
+from itertools import islice
+from typing import List, Tuple
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+from helper.upload_cache import upload_key
+from helper.query_routing import is_read_query, is_volatile_query
 # from junk.junk_app_context import custom_analysis
 
 st.set_page_config(page_title="SQL Query Interface", layout="wide")
 
+# Plain SQL identifiers only - user-supplied table names are interpolated into SQL
+_IDENT = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Fixed statements are built once so SQLAlchemy's compiled cache keeps hitting
+_Q_TABLES = text(
+    "SELECT m.name, (SELECT COUNT(*) FROM pragma_table_info(m.name)) AS ncols "
+    "FROM sqlite_master m WHERE m.type='table'"
+)
+_Q_SAMPLE_TABLES = text(
+    "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('employees', 'departments')"
+)
+_Q_SELECT1 = text("SELECT 1")
+
+
+# Rows sent to the browser per result table
+MAX_DISPLAY_ROWS = 1000
+
+# Engines live in the resource cache, never in st.session_state: Streamlit's
+# session-state stats walk (/_stcore/metrics) raises TypeError on Engine objects.
+# Session state only ever holds connection strings / file paths.
+@st.cache_resource
+def get_engine(conn_str: str):
+    """Create the engine (and its pool) once per connection string"""
+    if conn_str.startswith("sqlite"):
+        engine = create_engine(conn_str,
+                               poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_conn, _):
+            # WAL + NORMAL sync: readers don't block writers, one fsync less per commit
+            dbapi_conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA cache_size=-64000;
+                PRAGMA mmap_size=268435456;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA busy_timeout=5000;
+            """)
+
+        return engine
+    # Server databases: one shared pool per process; LIFO keeps the warmest connections in use
+    return create_engine(conn_str,
+                         pool_pre_ping=True,
+                         pool_use_lifo=True,
+                         pool_size=10,
+                         max_overflow=20)
+
+
+@st.cache_resource
+def get_engine_ro(conn_str: str):
+    """Read-only counterpart of get_engine() used for SELECT-style queries"""
+    # Reads run in AUTOCOMMIT: no BEGIN/COMMIT pair wrapped around every SELECT
+    if conn_str.startswith("sqlite:///"):
+        db_path = conn_str[len("sqlite:///"):]
+        engine = create_engine(f"sqlite:///file:{db_path}?mode=ro&uri=true",
+                               poolclass=StaticPool,
+                               isolation_level="AUTOCOMMIT",
+                               connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_ro_pragmas(dbapi_conn, _):
+            # No journal_mode here: switching to WAL needs a writable handle
+            dbapi_conn.executescript("""
+                PRAGMA cache_size=-64000;
+                PRAGMA mmap_size=268435456;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA busy_timeout=5000;
+            """)
+
+        return engine
+    if conn_str.startswith("postgresql"):
+        return create_engine(conn_str,
+                             pool_pre_ping=True,
+                             pool_use_lifo=True,
+                             pool_size=10,
+                             max_overflow=20,
+                             isolation_level="AUTOCOMMIT",
+                             execution_options={"postgresql_readonly": True})
+    # No driver-level read-only switch for the other dialects; share the read/write pool
+    return get_engine(conn_str).execution_options(isolation_level="AUTOCOMMIT")
+
+
+def read_query(conn_str: str, q: str) -> pd.DataFrame:
+    """Run a read-only query"""
+    with get_engine_ro(conn_str).connect() as conn:
+        # PRAGMA results are tiny - no point in chunking them
+        if q.lstrip()[:6].upper() == 'PRAGMA':
+            return pd.read_sql_query(text(q), conn, dtype_backend="pyarrow")
+
+        # Stream in chunks (server-side cursor where the driver has one) into Arrow-backed columns
+        chunks = pd.read_sql_query(text(q), conn.execution_options(stream_results=True),
+                                   chunksize=50_000, dtype_backend="pyarrow")
+        return pd.concat(chunks, ignore_index=True, copy=False)
+
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=64)
+def run_select(conn_str: str, q: str) -> pd.DataFrame:
+    """read_query memoized on (connection string, query)"""
+    return read_query(conn_str, q)
+
+
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV-encode a result set with PyArrow's C writer"""
+    import pyarrow as pa
+    import pyarrow.csv as pac
+
+    buf = io.BytesIO()
+    pac.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    return buf.getvalue()
+
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=16)
+def df_to_csv_bytes(conn_str: str, q: str, _df: pd.DataFrame) -> bytes:
+    """csv_bytes keyed on the query that produced the result set"""
+    return csv_bytes(_df)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def list_tables(conn_str: str) -> List[Tuple[str, int]]:
+    """List (table name, column count) for a SQLite database in one round trip"""
+    with get_engine(conn_str).connect() as conn:
+        result = conn.execute(_Q_TABLES)
+        return [(row[0], row[1]) for row in result.fetchall()]
+
+
+@st.cache_data(hash_funcs={UploadedFile: upload_key}, max_entries=8, show_spinner=False)
+def preview_upload(uploaded_file: UploadedFile, num_rows: int = 20):
+    """Cached preview of the first rows of an uploaded csv/json file"""
+    from helper.gen_sql_chunk import preview_uploaded_file
+    try:
+        return preview_uploaded_file(uploaded_file, num_rows=num_rows)
+    finally:
+        # Leave the pointer where the full conversion expects it
+        uploaded_file.seek(0)
+
+
+@st.cache_resource(show_spinner=False)
+def save_uploaded_db(file_id: str, _uploaded_file: UploadedFile) -> str:
+    """Write an uploaded SQLite file to a temp path once per upload (keyed on file_id)"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp_file:
+        # Copy in 1 MiB slices rather than materialising the whole upload as bytes
+        _uploaded_file.seek(0)
+        shutil.copyfileobj(_uploaded_file, tmp_file, length=1024 * 1024)
+        return tmp_file.name
+
+
+@functools.lru_cache(maxsize=1)
+def _load_insight_gen():
+    """Import the Cohere-backed helpers only once the GenAI path is actually used"""
+    from helper.insight_gen import SQLInsightGenerator, display_chat_history
+    return SQLInsightGenerator, display_chat_history
+
+
+# Sample database contents; the file name carries a hash of these, so any change
+# in code gets a fresh file instead of a stale copy left in the temp dir
+_SAMPLE_DDL = (
+    """
+            CREATE TABLE employees (
+                id INTEGER PRIMARY KEY, -- AUTOINCREMENT,
+                name TEXT NOT NULL,
+                department TEXT,
+                salary REAL NOT NULL,
+                hire_date DATE NOT NULL
+            )
+    """,
+    """
+            CREATE TABLE departments (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                budget REAL
+            )
+    """,
+)
+_SAMPLE_ROWS = {
+    "departments": (
+        "INSERT INTO departments (name, budget) VALUES (:n, :b)",
+        [
+            {"n": "Engineering", "b": 500000},
+            {"n": "Marketing", "b": 200000},
+            {"n": "Sales", "b": 300000},
+            {"n": "HR", "b": 150000},
+        ],
+    ),
+    "employees": (
+        "INSERT INTO employees (name, department, salary, hire_date) VALUES (:n, :d, :s, :h)",
+        [
+            {"n": "Allen Kupoluyi", "d": "Engineering", "s": 75000, "h": "2023-01-15"},
+            {"n": "Demilade Smith", "d": "Marketing", "s": 65000, "h": "2023-02-20"},
+            {"n": "Akan Daniel", "d": "Sales", "s": 55000, "h": "2023-03-10"},
+            {"n": "Chikezie Brown", "d": "Engineering", "s": 80000, "h": "2023-01-25"},
+            {"n": "Charlie Bilal", "d": "HR", "s": 50000, "h": "2023-04-05"},
+        ],
+    ),
+}
+_SAMPLE_FINGERPRINT = hashlib.sha1(repr((_SAMPLE_DDL, _SAMPLE_ROWS)).encode()).hexdigest()[:12]
+
+
+def _sample_db_intact(conn) -> bool:
+    """True if every sample table exists with its full set of rows"""
+    present = {row[0] for row in conn.execute(_Q_SAMPLE_TABLES)}
+    if present != set(_SAMPLE_ROWS):
+        return False
+    return all(
+        conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() == len(rows)
+        for table, (_, rows) in _SAMPLE_ROWS.items()
+    )
+
+
+@st.cache_resource
+def bootstrap_sample_db() -> str:
+    """Create the sample database (once per process) and return its path"""
+    sample_path = os.path.join(tempfile.gettempdir(), f"sql_iface_sample_{_SAMPLE_FINGERPRINT}.db")
+
+    # Single transaction: one commit instead of one per statement
+    with get_engine(f"sqlite:///{sample_path}").begin() as conn:
+        if _sample_db_intact(conn):
+            return sample_path
+
+        # Rebuild from scratch - a session may have dropped or emptied a sample table
+        for table in _SAMPLE_ROWS:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+        # Create sample tables
+        for ddl in _SAMPLE_DDL:
+            conn.execute(text(ddl))
+
+        # Insert into sample data (bound parameters -> one prepared statement per table)
+        for insert_sql, rows in _SAMPLE_ROWS.values():
+            conn.execute(text(insert_sql), rows)
+
+    return sample_path
+
+
 st.title("🗃️ SQL Query Interface")
 st.markdown("Execute SQL queries against various database types")
 
 ## Session state
 if 'query_history' not in st.session_state:
-    st.session_state.query_history = []
+    # Bounded, ordered history + a set side index for O(1) membership checks
+    st.session_state.query_history = deque(maxlen=200)
+    st.session_state.query_history_set = set()
 
 if 'sample_data_created' not in st.session_state:
     st.session_state.sample_data_created = False
@@ -27,6 +273,69 @@ if 'sample_data_created' not in st.session_state:
 if 'current_query' not in st.session_state:
     st.session_state.current_query = ""
 
+if 'returned_df' not in st.session_state:
+    st.session_state.returned_df = pd.DataFrame()
+
+
+def _set_query(q: str):
+    """Button callback: load a query into the editor (no extra st.rerun needed)"""
+    st.session_state.current_query = q
+
+
+def _table_info_query(table: str) -> str:
+    """Structure query via the pragma_table_info() table-valued function (table name as a literal)"""
+    table_literal = "'" + table.replace("'", "''") + "'"
+    return f"SELECT * FROM pragma_table_info({table_literal});"
+
+
+@functools.lru_cache(maxsize=32)
+def _quick_queries(tn: str) -> dict:
+    """Quick-action queries for a converted table (tn must already match _IDENT)"""
+    quoted = f'"{tn}"'
+    return {
+        f"Show all {tn}": f"SELECT * FROM {quoted} LIMIT 100;",
+        f"Count {tn} records": f"SELECT COUNT(*) as total_records FROM {quoted};",
+        f"Show {tn} structure": _table_info_query(tn),
+        f"Sample 10 records": f"SELECT * FROM {quoted} ORDER BY RANDOM() LIMIT 10;"
+    }
+
+
+# Static quick-action queries, built once at import instead of on every rerun
+SAMPLE_QUERIES = (
+    ("Show all employees", "SELECT * FROM employees;"),
+    ("High salary employees", "SELECT * FROM employees WHERE salary > 65000;"),
+    ("Count by department", "SELECT department, COUNT(*) as count FROM employees GROUP BY department;"),
+    ("Join employees & departments", "SELECT e.name, e.salary, d.budget\n"
+                                     "FROM employees e\n"
+                                     "JOIN departments d ON e.department = d.name;"),
+    ("Show table structure", _table_info_query("employees")),
+)
+
+COMMON_QUERIES = (
+    ("Show all tables", {
+        "PostgreSQL": "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';",
+        "MySQL": "SHOW TABLES;",
+        "SQL Server": "SELECT name FROM sys.tables;"
+    }),
+    ("Show databases", {
+        "PostgreSQL": "SELECT datname FROM pg_database;",
+        "MySQL": "SHOW DATABASES;",
+        "SQL Server": "SELECT name FROM sys.databases;"
+    }),
+)
+
+
+def _add_to_history(q: str):
+    """Record an executed query once, evicting the oldest when history is full"""
+    if q in st.session_state.query_history_set:
+        return
+    history = st.session_state.query_history
+    if len(history) == history.maxlen:
+        st.session_state.query_history_set.discard(history[0])
+    history.append(q)
+    st.session_state.query_history_set.add(q)
+
+
 # Sidebar for database configuration
 st.sidebar.header("Database Configuration")
 
@@ -42,88 +351,28 @@ engine = None
 connection_string = ""
 
 if db_type == "SQLite (Sample Data)":
-    # Create a temporary file-based SQLite database for better persistence
-    if 'sample_db_path' not in st.session_state:
-        # Create a temporary database file
-        temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-        st.session_state.sample_db_path = temp_db.name
-        temp_db.close()
-
-        # Create engine and sample data
-        engine = create_engine(f"sqlite:///{st.session_state.sample_db_path}")
-
-        with engine.connect() as conn:
-            try:
-                # Create sample tables
-                conn.execute(text("""
-                    CREATE TABLE employees (
-                        id INTEGER PRIMARY KEY, -- AUTOINCREMENT,
-                        name TEXT NOT NULL,
-                        department TEXT,
-                        salary REAL NOT NULL,
-                        hire_date DATE NOT NULL
-                    )
-                """))
-
-                conn.execute(text("""
-                    CREATE TABLE departments (
-                        id INTEGER PRIMARY KEY,
-                        name TEXT NOT NULL,
-                        budget REAL
-                    )
-                """))
-
-                # Insert into sample data
-                conn.execute(text("""
-                    INSERT INTO departments (name, budget) VALUES
-                        ('Engineering', 500000),
-                        ('Marketing', 200000),
-                        ('Sales', 300000),
-                        ('HR', 150000)
-                """))
-
-                conn.execute(text("""
-                    INSERT INTO employees (name, department, salary, hire_date) VALUES 
-                        ('Allen Kupoluyi', 'Engineering', 75000, '2023-01-15'),
-                        ('Demilade Smith', 'Marketing', 65000, '2023-02-20'),
-                        ('Akan Daniel', 'Sales', 55000, '2023-03-10'),
-                        ('Chikezie Brown', 'Engineering', 80000, '2023-01-25'),
-                        ('Charlie Bilal', 'HR', 50000, '2023-04-05')
-                """))
-
-                conn.commit()
-                st.session_state.sample_engine = engine
-
-            except Exception as e:
-                st.sidebar.error(f"Error creating sample .db: {str(e)}")
-
-    # Use existing sample .db
-    engine = create_engine(f"sqlite:///{st.session_state.sample_db_path}")
-    connection_string = f"sqlite:///{st.session_state.sample_db_path}"
-
-    # Verify tables exist
     try:
-        with engine.connect() as conn:
-            tables_result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
-            existing_tables = [row[0] for row in tables_result.fetchall()]
+        # Sample .db lives at a fixed temp path and is built once per process
+        st.session_state.sample_db_path = bootstrap_sample_db()
+        connection_string = f"sqlite:///{st.session_state.sample_db_path}"
+        engine = get_engine(connection_string)
+
+        # Verify tables exist
+        existing_tables = list_tables(connection_string)
 
         st.sidebar.success("✅ Connected to sample SQLite database")
         if existing_tables:
-            st.sidebar.info(f"Available tables: {', '.join(existing_tables)}")
+            st.sidebar.info(f"Available tables: {', '.join(name for name, _ in existing_tables)}")
         else:
             st.sidebar.warning("⚠️ No tables found")
 
     except Exception as e:
-        st.sidebar.error(f"❌ Error: {str(e)}")
-        # Reset if there's an issue
-        if 'sample_db_path' in st.session_state:
-            del st.session_state.sample_db_path
-        st.rerun()
+        st.sidebar.error(f"❌ Error creating sample .db: {str(e)}")
 
 elif db_type == "SQLite (File Upload)":
     ## Convert .csv/.json to .db
     if st.sidebar.toggle("Convert my csv/json"):
-        from helper.gen_sql_chunk import *
+        from helper.gen_sql_chunk import get_file_info, create_sqlite_from_uploaded_file
 
         uploaded_file = st.sidebar.file_uploader("Upload your csv/json file", type=["csv", "json"])
 
@@ -138,7 +387,7 @@ elif db_type == "SQLite (File Upload)":
 
                 # Show preview
                 with st.sidebar.expander("📋 Preview Data"):
-                    preview_df = preview_uploaded_file(uploaded_file)
+                    preview_df = preview_upload(uploaded_file, num_rows=20)
                     if isinstance(preview_df, pd.DataFrame):
                         st.dataframe(preview_df, use_container_width=True)
                     else:
@@ -147,6 +396,10 @@ elif db_type == "SQLite (File Upload)":
                 # Configuration options
                 st.sidebar.subheader("Conversion Settings")
                 table_name = st.sidebar.text_input("Table name", value="data")
+                table_name_ok = bool(_IDENT.match(table_name))
+                if not table_name_ok:
+                    st.sidebar.error("Table name must start with a letter or underscore "
+                                     "and contain only letters, digits and underscores")
 
                 # Smart default for sample size
                 default_sample = min(file_info['rows'], 10000)
@@ -162,7 +415,7 @@ elif db_type == "SQLite (File Upload)":
                 else:
                     st.sidebar.info(f"Will use all {file_info['rows']:,} records")
 
-                if st.sidebar.button("🔄 Convert to SQLite", type="primary"):
+                if st.sidebar.button("🔄 Convert to SQLite", type="primary", disabled=not table_name_ok):
                     try:
                         with st.spinner("Converting file to SQLite..."):
                             # Convert uploaded file to sqlite
@@ -172,15 +425,12 @@ elif db_type == "SQLite (File Upload)":
                                 sample_size=sample_size if sample_size > 0 else None
                             )
 
-                            engine = create_engine(f"sqlite:///{temp_db_pth}")
                             connection_string = f"sqlite:///{temp_db_pth}"
+                            engine = get_engine(connection_string)
 
                             with engine.connect() as conn:
-                                tables_result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
-                                tables = [row[0] for row in tables_result.fetchall()]
-
                                 ## Get summaries
-                                count_result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
+                                count_result = conn.execute(text(f'SELECT COUNT(*) FROM "{table_name}"'))
                                 record_count = count_result.fetchone()[0]
 
                             st.sidebar.success(f"✅ Converted successfully!")
@@ -189,7 +439,6 @@ elif db_type == "SQLite (File Upload)":
 
                             # Store the converted database info in session state
                             st.session_state.converted_db_path = temp_db_pth
-                            st.session_state.converted_engine = engine
                             st.session_state.converted_table_name = table_name
 
                     except Exception as e:
@@ -200,9 +449,9 @@ elif db_type == "SQLite (File Upload)":
                 st.sidebar.error(f"❌ Error reading file: {file_info['error']}")
 
             # If conversion was successful, use the converted database
-            if 'converted_engine' in st.session_state:
-                engine = st.session_state.converted_engine
+            if 'converted_db_path' in st.session_state:
                 connection_string = f"sqlite:///{st.session_state.converted_db_path}"
+                engine = get_engine(connection_string)
 
                 # Show quick actions for converted database
                 st.sidebar.markdown("---")
@@ -211,17 +460,11 @@ elif db_type == "SQLite (File Upload)":
                 table_name = st.session_state.converted_table_name
 
                 # Sample queries for the converted data
-                sample_queries = {
-                    f"Show all {table_name}": f"SELECT * FROM {table_name} LIMIT 100;",
-                    f"Count {table_name} records": f"SELECT COUNT(*) as total_records FROM {table_name};",
-                    f"Show {table_name} structure": f"PRAGMA table_info({table_name});",
-                    f"Sample 10 records": f"SELECT * FROM {table_name} ORDER BY RANDOM() LIMIT 10;"
-                }
+                sample_queries = _quick_queries(table_name)
 
                 for label, query in sample_queries.items():
-                    if st.sidebar.button(label, key=f"converted_{label}"):
-                        st.session_state.current_query = query
-                        st.rerun()
+                    st.sidebar.button(label, key=f"converted_{label}",
+                                      on_click=_set_query, args=(query,))
 
         else:
             st.sidebar.info("👆 Upload a CSV or JSON file to convert")
@@ -242,23 +485,18 @@ elif db_type == "SQLite (File Upload)":
         uploaded_file = st.sidebar.file_uploader("Upload SQLite file", type=['db', 'sqlite', 'sqlite3'])
 
         if uploaded_file:
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                temp_pth = tmp_file.name
-
             try:
-                engine = create_engine(f"sqlite:///{temp_pth}")
+                # Save uploaded file temporarily (once per upload, so the cached engine is reused)
+                temp_pth = save_uploaded_db(uploaded_file.file_id, uploaded_file)
                 connection_string = f"sqlite:///{temp_pth}"
+                engine = get_engine(connection_string)
 
                 # Test connection and show available tables
-                with engine.connect() as conn:
-                    tables_result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
-                    tables = [row[0] for row in tables_result.fetchall()]
+                tables = list_tables(connection_string)
 
                 st.sidebar.success("✅ Connected to SQLite file")
                 if tables:
-                    st.sidebar.info(f"Available tables: {', '.join(tables)}")
+                    st.sidebar.info(f"Available tables: {', '.join(name for name, _ in tables)}")
                 else:
                     st.sidebar.warning("No tables found in database")
 
@@ -285,15 +523,23 @@ else:
             elif db_type == "SQL Server":
                 connection_string = f"mssql+pyodbc://{username}:{password}@{host}:{port}/{database}?driver=ODBC+Driver+17+for+SQL+Server"
 
-            engine = create_engine(connection_string)
+            engine = get_engine(connection_string)
             # Test connection
             with engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+                conn.execute(_Q_SELECT1)
 
+            # Keep only the string; the engine is looked up from the cache on later reruns
+            st.session_state.remote_db_type = db_type
+            st.session_state.remote_connection_string = connection_string
             st.sidebar.success("✅ Connected successfully")
         except Exception as e:
+            engine = None
             st.sidebar.error(f"❌ Connection failed: {str(e)}")
 
+    elif st.session_state.get('remote_db_type') == db_type:
+        connection_string = st.session_state.remote_connection_string
+        engine = get_engine(connection_string)
+
 ##-----------------------
 # Main interface
 ##-----------------------
@@ -319,11 +565,7 @@ with col1:
         execute_btn = st.button("▶️ Execute", type="primary")
 
     with col_btn2:
-        clear_btn = st.button("🗑️ Clear")
-
-    if clear_btn:
-        st.session_state.current_query = ""
-        st.rerun()
+        st.button("🗑️ Clear", on_click=_set_query, args=("",))
 
 with col2:
     st.header("Quick Actions")
@@ -333,133 +575,108 @@ with col2:
         if db_type == "SQLite (Sample Data)":
             st.subheader("Sample Queries")
 
-            sample_queries = {
-                "Show all employees": "SELECT * FROM employees;",
-                "High salary employees": "SELECT * FROM employees WHERE salary > 65000;",
-                "Count by department": "SELECT department, COUNT(*) as count FROM employees GROUP BY department;",
-                "Join employees & departments": """SELECT e.name, e.salary, d.budget 
-                FROM employees e 
-                JOIN departments d ON e.department = d.name;""",
-                "Show table structure": "PRAGMA table_info(employees);"
-            }
-
-            for label, sample_query in sample_queries.items():
-                if st.button(label, key=f"sample_{label}"):
-                    st.session_state.current_query = sample_query
-                    st.rerun()
+            for label, sample_query in SAMPLE_QUERIES:
+                st.button(label, key=f"sample_{label}",
+                          on_click=_set_query, args=(sample_query,))
 
         elif db_type == "SQLite (File Upload)" and engine:
             st.subheader("Database Info")
             try:
-                with engine.connect() as conn:
-                    # Get table names
-                    tables_result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
-                    tables = [row[0] for row in tables_result.fetchall()]
-
-                    if tables:
-                        st.write("**Available Tables:**")
-                        for table in tables:
-                            # Get row count for each table
-                            try:
-                                # count_result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                                # count = count_result.fetchone()[0]
-                                # st.write(f"• `{table}` ({count} rows)")
-
-                                # Add button to show table structure
-                                if st.button(f"Show {table} structure", key=f"struct_{table}"):
-                                    st.session_state.current_query = f"PRAGMA table_info({table});"
-                                    st.rerun()
-
-                                # Add button to show sample data
-                                if st.button(f"Sample from {table}", key=f"sample_{table}"):
-                                    st.session_state.current_query = f"SELECT * FROM {table} ORDER BY RANDOM() LIMIT 10;"
-                                    st.rerun()
-                            except:
-                                st.write(f"• `{table}`")
-                    else:
-                        st.write("No tables found")
+                # Get table names (cached, shared with the sidebar)
+                tables = list_tables(connection_string)
+
+                if tables:
+                    st.write("**Available Tables:**")
+                    quote = engine.dialect.identifier_preparer.quote
+                    for table, ncols in tables:
+                        st.write(f"• `{table}` ({ncols} columns)")
+
+                        # Add button to show table structure
+                        st.button(f"Show {table} structure", key=f"struct_{table}",
+                                  on_click=_set_query, args=(_table_info_query(table),))
+
+                        # Add button to show sample data
+                        st.button(f"Sample from {table}", key=f"sample_{table}",
+                                  on_click=_set_query,
+                                  args=(f"SELECT * FROM {quote(table)} ORDER BY RANDOM() LIMIT 10;",))
+                else:
+                    st.write("No tables found")
             except Exception as e:
                 st.error(f"Error reading database info: {str(e)}")
 
         elif engine and db_type in ["PostgreSQL", "MySQL", "SQL Server"]:
             st.subheader("Common Queries")
 
-            common_queries = {
-                "Show all tables": {
-                    "PostgreSQL": "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';",
-                    "MySQL": "SHOW TABLES;",
-                    "SQL Server": "SELECT name FROM sys.tables;"
-                },
-                "Show databases": {
-                    "PostgreSQL": "SELECT datname FROM pg_database;",
-                    "MySQL": "SHOW DATABASES;",
-                    "SQL Server": "SELECT name FROM sys.databases;"
-                }
-            }
-
-            for label, queries in common_queries.items():
-                if st.button(label, key=f"common_{label}"):
-                    st.session_state.current_query = queries.get(db_type,
-                                                                 "-- Query not available for this database type")
-                    st.rerun()
+            for label, queries in COMMON_QUERIES:
+                st.button(label, key=f"common_{label}",
+                          on_click=_set_query,
+                          args=(queries.get(db_type, "-- Query not available for this database type"),))
 
     # Query history
     with col2_2:
         if st.session_state.query_history:
             # st.markdown("")
             st.subheader("Query History")
-            for i, hist_query in enumerate(reversed(st.session_state.query_history[-5:])):
-                if st.button(f"📝 Query {len(st.session_state.query_history) - i}", key=f"hist_{i}"):
-                    st.session_state.current_query = hist_query
-                    st.rerun()
+            history = st.session_state.query_history
+            n_history = len(history)
+            for i, hist_query in enumerate(islice(reversed(history), 5)):
+                st.button(f"📝 Query {n_history - i}", key=f"hist_{i}",
+                          on_click=_set_query, args=(hist_query,))
 
 # Execute query
 if execute_btn and query and engine:
     try:
         with st.spinner("Executing query..."):
-            with engine.connect() as conn:
-                # Execute query
-                result = conn.execute(text(query))
+            # Handle different types of queries
+            if is_read_query(query):
+                # Query returns data; results that differ per run are never served from cache
+                cacheable = not is_volatile_query(query)
+                df = run_select(connection_string, query) if cacheable else read_query(connection_string, query)
 
                 # Add to history
-                if query not in st.session_state.query_history:
-                    st.session_state.query_history.append(query)
-
-                # Handle different types of queries
-                if query.strip().upper().startswith(('SELECT', 'SHOW', 'DESCRIBE', 'PRAGMA')):
-                    # Query returns data
-                    df = pd.DataFrame(result.fetchall(), columns=result.keys())  # ["name", "salary", "budget"])
-                    if 'returned_df' not in st.session_state:
-                        st.session_state.returned_df = pd.DataFrame()
-                    if not df.equals(st.session_state.returned_df):
-                        st.session_state.returned_df = df
-
-                    if not df.empty:
-                        st.success(f"✅ Query executed successfully! ({len(df)} rows returned)")
-
-                        # Display results
-                        st.subheader("Query Results")
-                        st.dataframe(df, use_container_width=True)
-
-                        # Download option
-                        csv = df.to_csv(index=False)
-                        st.download_button(
-                            label="📥 Download as CSV",
-                            data=csv,
-                            file_name="query_results.csv",
-                            mime="text/csv"
-                        )
-                    else:
-                        st.info("Query executed successfully but returned no results.")
-
+                _add_to_history(query)
+
+                # Fresh frame per execution - a plain assignment beats a cell-by-cell equals()
+                st.session_state.returned_df = df
+
+                if not df.empty:
+                    st.success(f"✅ Query executed successfully! ({len(df)} rows returned)")
+
+                    # Display results
+                    st.subheader("Query Results")
+                    # Only the head goes to the browser; the full frame stays in session_state for download/AI
+                    st.dataframe(df.head(MAX_DISPLAY_ROWS), use_container_width=True)
+                    if len(df) > MAX_DISPLAY_ROWS:
+                        st.caption(f"Showing first {MAX_DISPLAY_ROWS:,} of {len(df):,} rows")
+
+                    # Download option
+                    csv = df_to_csv_bytes(connection_string, query, df) if cacheable else csv_bytes(df)
+                    st.download_button(
+                        label="📥 Download as CSV",
+                        data=csv,
+                        file_name="query_results.csv",
+                        mime="text/csv"
+                    )
                 else:
-                    # i.e Query modifies data (e.g INSERT, UPDATE, DELETE, CREATE, etc..)
-                    conn.commit()
-                    st.success("✅ Query executed successfully!")
+                    st.info("Query executed successfully but returned no results.")
+
+            else:
+                # i.e Query modifies data (e.g INSERT, UPDATE, DELETE, CREATE, etc..)
+                with engine.begin() as conn:
+                    result = conn.execute(text(query))
+
+                # Add to history
+                _add_to_history(query)
 
-                    # display change
-                    if hasattr(result, 'rowcount') and result.rowcount >= 0:
-                        st.info(f"Affected rows: {result.rowcount}")
+                # Cached reads (and table listings, after DDL) may now be stale
+                run_select.clear()
+                df_to_csv_bytes.clear()
+                list_tables.clear()
+                st.success("✅ Query executed successfully!")
+
+                # display change
+                if hasattr(result, 'rowcount') and result.rowcount >= 0:
+                    st.info(f"Affected rows: {result.rowcount}")
 
     except SQLAlchemyError as e:
         st.error(f"❌ SQL Error: {str(e)}")
@@ -498,13 +715,88 @@ with st.sidebar.expander("ℹ️ How to use this interface"):
 #=================
 # Gen Ai
 #=================
+@st.fragment
+def _genai_panel(output_df: pd.DataFrame, query: str, db_type_name: str):
+    """AI analysis panel - its buttons and text input rerun only this fragment"""
+    try:
+        # Only rebuild the prompt context when the query or its result changed;
+        # every execute stores a fresh returned_df, so identity is enough
+        if (output_df is not st.session_state.get('ai_context_df')
+                or query != st.session_state.get('ai_context_query')):
+            # Custom AI prompt interface
+            st.session_state.ai_generator.update_context(
+                query = query,
+                dataframe = output_df,
+                db_type=db_type_name,
+                tables_info=None
+            )
+            st.session_state.ai_context_df = output_df
+            st.session_state.ai_context_query = query
+
+        # Option 1: Automatic Analysis
+        col1, col2 = st.columns(2)
+
+        with col1:
+            if st.button("Analyze Data",
+                         use_container_width=True,
+                         key = "data_anlyze",
+                         icon = "📊"):
+                st.markdown("### Data Analysis")
+                with st.spinner("Analyzing your data..."):
+                    #General Analysis - streamed into the page as it is generated
+                    st.session_state.ai_generator.analyze_data(
+                        output_df,
+                        stream=True
+                    )
+
+        with col2:
+            if st.button("Suggest Visualizations",
+                         use_container_width=True,
+                         key = "data_viz",
+                         icon = "📈"):
+                st.markdown("### Visualization Suggestions")
+                with st.spinner("Generating visualization suggestions..."):
+                    st.session_state.ai_generator.suggest_visualizations(
+                        output_df,
+                        stream=True
+                    )
+
+        # Option 2: Custom analysis request
+        st.markdown("---")
+        col3, col4 = st.columns([4, 1])
+
+        with col3:
+            analysis_request = st.text_input(
+                "What specific analysis would you like?",
+                placeholder="e.g., 'Find outliers in salary data' or 'Compare performance across departments'"
+            )
+
+        with col4:
+            st.markdown("")
+            custom_analysis = st.button("Custom Analysis",
+                         type="primary",
+                         key = "custom_analysis",
+                         icon = "🔍")
+        if custom_analysis and analysis_request:
+            st.markdown("## Custom Analysis Results")
+            with st.spinner("Performing custom analysis..."):
+                st.session_state.ai_generator.analyze_data(
+                    output_df,
+                    analysis_request,
+                    stream=True
+                )
+        else:
+            st.warning("Please enter an analysis request first!")
+    except Exception as e:
+        # st.sidebar is not available inside a fragment
+        st.error(f"Error with AI Data Analysis: {str(e)}")
+
+
 # You can only use after SQL execution
 if (hasattr(st.session_state, 'current_query') and
     st.session_state.current_query is not None and
     st.session_state.current_query.strip() != ""):
-    from helper.insight_gen import SQLInsightGenerator, display_chat_history
     # from visualization_helper import DataVisualizer, display_visualization_interface
-    import plotly.express as px
 
     # Initialize AI and Visualization components (add after existing session state)
     # def initialize_components():
@@ -532,6 +824,7 @@ if (hasattr(st.session_state, 'current_query') and
                                     type="password",
                                     label_visibility="collapsed")
         if API_KEY:
+                SQLInsightGenerator, display_chat_history = _load_insight_gen()
                 st.session_state.ai_generator = SQLInsightGenerator(API_KEY)
                 #Add test 200 Response from Cohere - then -
                 st.success("✅ AI Assistant activated!")
@@ -541,72 +834,8 @@ if (hasattr(st.session_state, 'current_query') and
                         not st.session_state.returned_df.empty):
                     output_df = st.session_state.returned_df
                     if st.expander("🧠 AI Data Analysis"):
-                        try:
-                            # Custom AI prompt interface
-                            st.session_state.ai_generator.update_context(
-                                query = query,
-                                dataframe = st.session_state.returned_df,
-                                db_type=str(engine.url.drivername),
-                                tables_info=None
-                            )
-
-                            # Option 1: Automatic Analysis
-                            col1, col2 = st.columns(2)
-
-                            with col1:
-                                if st.button("Analyze Data",
-                                             use_container_width=True,
-                                             key = "data_anlyze",
-                                             icon = "📊"):
-                                    with st.spinner("Analyzing your data..."):
-                                        #General Analysis
-                                        analysis = st.session_state.ai_generator.analyze_data(
-                                            st.session_state.returned_df
-                                        )
-                                        st.markdown("### Data Analysis")
-                                        st.markdown(analysis)
-
-                            with col2:
-                                if st.button("Suggest Visualizations",
-                                             use_container_width=True,
-                                             key = "data_viz",
-                                             icon = "📈"):
-                                    with st.spinner("Generating visualization suggestions..."):
-                                        viz_suggestions = st.session_state.ai_generator.suggest_visualizations(
-                                            st.session_state.returned_df
-                                        )
-                                        st.markdown("### Visualization Suggestions")
-                                        st.markdown(viz_suggestions)
-
-                            # Option 2: Custom analysis request
-                            st.markdown("---")
-                            col3, col4 = st.columns([4, 1])
-
-                            with col3:
-                                analysis_request = st.text_input(
-                                    "What specific analysis would you like?",
-                                    placeholder="e.g., 'Find outliers in salary data' or 'Compare performance across departments'"
-                                )
-
-                            with col4:
-                                st.markdown("")
-                                custom_analysis = st.button("Custom Analysis",
-                                             type="primary",
-                                             key = "custom_analysis",
-                                             icon = "🔍")
-                            if custom_analysis and analysis_request:
-                                with st.spinner("Performing custom analysis..."):
-                                    custom_analysis = st.session_state.ai_generator.analyze_data(
-                                        st.session_state.returned_df,
-                                        analysis_request
-                                    )
-
-                                    st.markdown("## Custom Analysis Results")
-                                    st.markdown(custom_analysis)
-                            else:
-                                st.warning("Please enter an analysis request first!")
-                        except Exception as e:
-                            st.sidebar.error(f"Error with AI Data Analysis: {str(e)}")
+                        _genai_panel(output_df, query,
+                                     str(engine.url.drivername) if engine else db_type)
 
                 if (hasattr(st.session_state, 'ai_generator') and
                     st.session_state.ai_generator is not None):
@@ -1,13 +1,58 @@
 # helper/gen_sql_chunk.py
+import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import sqlite3
 import json
+import csv
 import tempfile
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
-import io
+import datetime
+import re
+from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+from pydantic_core import from_json
+from helper.upload_cache import upload_key
+
+# Column-name sanitising: any run of non-identifier characters becomes one underscore
+_COL_BAD = re.compile(r"[^0-9A-Za-z_]")
+_COL_RUN = re.compile(r"_+")
+
+# Connection settings for one-off bulk loads: rollback journal kept in RAM (so a
+# failed load still rolls back a DROP TABLE), exclusive lock, temp b-trees in RAM
+# and a ~200 MB page cache
+_BULK_LOAD_PRAGMAS = """
+    PRAGMA journal_mode=MEMORY;
+    PRAGMA locking_mode=EXCLUSIVE;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-200000;
+"""
+
+# Only for an empty temp file we created ourselves and delete if the load fails:
+# no rollback journal and no fsync at all
+_FRESH_FILE_PRAGMAS = """
+    PRAGMA journal_mode=OFF;
+    PRAGMA synchronous=OFF;
+"""
+
+def records_to_dataframe(records):
+    """
+    Build a DataFrame from a list of JSON records column-wise: gather each key's
+    values into one list, instead of letting pandas pivot row dicts itself.
+    Lists that aren't all objects go through the regular constructor.
+    """
+    if not records or not all(isinstance(r, dict) for r in records):
+        return pd.DataFrame(records)
+
+    # Union of keys in first-seen order, like pd.DataFrame(list_of_dicts)
+    keys = dict.fromkeys(chain.from_iterable(records))
+    return pd.DataFrame({key: [r.get(key) for r in records] for key in keys}, copy=False)
+
 
-def csv_to_sqlite_sample_data(csv_file_path, table_name="data", sample_size=1000):
+def csv_to_sqlite_sample_data(csv_file_path, table_name="data", sample_size=1000, chunk_size=10_000):
     """
     Convert CSV file to SQLite sample data code for Streamlit app
 
@@ -15,6 +60,7 @@ def csv_to_sqlite_sample_data(csv_file_path, table_name="data", sample_size=1000
         csv_file_path (str): Path to CSV file
         table_name (str): Name for the table in SQLite
         sample_size (int): Number of rows to include in sample (for large files)
+        chunk_size (int): Rows per generated INSERT batch
 
     Returns:
         str: Python code to create the sample data
@@ -38,10 +84,10 @@ def csv_to_sqlite_sample_data(csv_file_path, table_name="data", sample_size=1000
                          for col in df_sample.columns]
 
     # Generate CREATE TABLE statement
-    create_table_sql = generate_create_table_sql(df_sample, table_name)
+    create_table_sql = _indent_continuation(generate_create_table_sql(df_sample, table_name))
 
     # Generate INSERT statements
-    insert_sql = generate_insert_sql(df_sample, table_name)
+    insert_sql = _indent_continuation(generate_insert_sql(df_sample, table_name, chunk_size))
 
     # Generate the complete Python code for Streamlit
     python_code = f'''
@@ -62,24 +108,24 @@ def csv_to_sqlite_sample_data(csv_file_path, table_name="data", sample_size=1000
     return python_code
 
 
-def json_to_sqlite_sample_data(json_file_path, table_name="data", sample_size=1000):
+def json_to_sqlite_sample_data(json_file_path, table_name="data", sample_size=1000, chunk_size=10_000):
     """
     Convert JSON file to SQLite sample data code for Streamlit app
     """
 
     # Read JSON file
     print(f"Reading JSON file: {json_file_path}")
-    with open(json_file_path, 'r') as f:
-        data = json.load(f)
+    with open(json_file_path, 'rb') as f:
+        data = from_json(f.read())
 
     # Convert to DataFrame
     if isinstance(data, list):
-        df = pd.DataFrame(data)
+        df = records_to_dataframe(data)
     elif isinstance(data, dict):
         # If it's a dict, try to find the main data array
         if len(data) == 1:
             key = list(data.keys())[0]
-            df = pd.DataFrame(data[key])
+            df = records_to_dataframe(data[key])
         else:
             df = pd.DataFrame([data])
     else:
@@ -100,10 +146,10 @@ def json_to_sqlite_sample_data(json_file_path, table_name="data", sample_size=10
                          for col in df_sample.columns]
 
     # Generate CREATE TABLE statement
-    create_table_sql = generate_create_table_sql(df_sample, table_name)
+    create_table_sql = _indent_continuation(generate_create_table_sql(df_sample, table_name))
 
     # Generate INSERT statements
-    insert_sql = generate_insert_sql(df_sample, table_name)
+    insert_sql = _indent_continuation(generate_insert_sql(df_sample, table_name, chunk_size))
 
     # Generate the complete Python code for Streamlit
     python_code = f'''
@@ -124,6 +170,11 @@ def json_to_sqlite_sample_data(json_file_path, table_name="data", sample_size=10
     return python_code
 
 
+def _indent_continuation(code, prefix="    "):
+    """Indent every line after the first, to splice a block into the indented code templates"""
+    return code.replace("\n", "\n" + prefix)
+
+
 def generate_create_table_sql(df, table_name):
     """Generate CREATE TABLE SQL statement from DataFrame"""
 
@@ -143,71 +194,241 @@ def generate_create_table_sql(df, table_name):
         else:
             sql_type = "TEXT"
 
-        columns.append(f"    {col} {sql_type}")
+        columns.append(f"    {_quote_ident(col)} {sql_type}")
 
-    create_sql = f"CREATE TABLE {table_name} (\n" + ",\n".join(columns) + "\n)"
+    create_sql = f"CREATE TABLE {_quote_ident(table_name)} (\n" + ",\n".join(columns) + "\n)"
     return create_sql
 
 
-def generate_insert_sql(df, table_name):
-    """Generate INSERT SQL statements from DataFrame"""
+def _quote_ident(name):
+    """Quote a SQLite identifier"""
+    return '"' + str(name).replace('"', '""') + '"'
 
-    # Convert DataFrame to list of tuples for SQL insertion
-    records = []
-    for _, row in df.iterrows():
-        record_values = []
-        for value in row:
-            if pd.isna(value):
-                record_values.append("NULL")
-            elif isinstance(value, str):
-                # Escape single quotes in strings
-                escaped_value = value.replace("'", "''")
-                record_values.append(f"'{escaped_value}'")
-            elif isinstance(value, (int, float)):
-                record_values.append(str(value))
-            elif isinstance(value, bool):
-                record_values.append("1" if value else "0")
-            else:
-                # Convert other types to string
-                escaped_value = str(value).replace("'", "''")
-                record_values.append(f"'{escaped_value}'")
 
-        records.append(f"({', '.join(record_values)})")
+def _sqlite_bindable(values):
+    """
+    Convert a column to values sqlite3 can bind: NA/NaT become None, and the
+    timestamps, dates and times pyarrow.csv infers become ISO-format strings
+    """
+    present = values.notna()
+    if values.dtype.kind in 'Mm':
+        return values.astype(str).astype(object).where(present, None)
 
-    # Split into chunks to avoid very long SQL statements
-    chunk_size = 100
-    insert_statements = []
+    values = values.astype(object).where(present, None)
+    temporal = (datetime.date, datetime.time, datetime.timedelta)
+    if present.any() and isinstance(values[present].iloc[0], temporal):
+        values = values.map(lambda v: str(v) if isinstance(v, temporal) else v)
+    return values
 
-    columns = ', '.join(df.columns)
 
-    for i in range(0, len(records), chunk_size):
-        chunk = records[i:i + chunk_size]
-        values_str = ',\n    '.join(chunk)
+def bulk_insert(conn, df, table_name, chunk_size=5000):
+    """
+    Insert DataFrame rows into an existing table with parameterized executemany
+
+    Args:
+        conn: sqlite3 connection
+        df (pd.DataFrame): Rows to insert
+        table_name (str): Target table
+        chunk_size (int): Rows bound per executemany call
+
+    All chunks are written in a single transaction.
+    """
+    # Plain numpy numeric columns bind as-is (NaN is stored as NULL); everything
+    # else is converted to values sqlite3 can bind
+    df = df.copy(deep=False)
+    for i, dtype in enumerate(df.dtypes):
+        if not (isinstance(dtype, np.dtype) and dtype.kind in 'biuf'):
+            df.isetitem(i, _sqlite_bindable(df.iloc[:, i]))
+
+    columns = ', '.join(_quote_ident(col) for col in df.columns)
+    placeholders = ', '.join('?' * len(df.columns))
+    insert_sql = f"INSERT INTO {_quote_ident(table_name)} ({columns}) VALUES ({placeholders})"
+
+    rows = df.itertuples(index=False, name=None)
+    with conn:  # BEGIN ... COMMIT (ROLLBACK on error)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            conn.executemany(insert_sql, chunk)
+
+
+# Characters that can't appear raw inside a '...' literal (backslash first)
+_PY_STR_ESCAPES = (('\\', '\\\\'), ("'", "\\'"), ('\n', '\\n'), ('\r', '\\r'), ('\x00', '\\x00'))
+
+
+def _format_py_column(series):
+    """Render one column as Python literals for the generated rows list"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        formatted = series.astype(str).replace({'inf': "float('inf')", '-inf': "float('-inf')"})
+    else:
+        # Strings and everything else (dates, mixed objects): quoted str literals.
+        # Escaping runs as Arrow string kernels, which release the GIL
+        text = series.astype(str).astype('string[pyarrow]')
+        for char, escaped in _PY_STR_ESCAPES:
+            text = text.str.replace(char, escaped, regex=False)
+        formatted = ("'" + text + "'").astype(object)
+
+    return formatted.mask(series.isna(), "None")
 
-        insert_sql = f'''conn.execute(text("""
-            INSERT INTO {table_name} ({columns}) VALUES 
-            {values_str}
-        """))'''
 
-        insert_statements.append(insert_sql)
+def generate_insert_sql(df, table_name, chunk_size=10_000):
+    """
+    Generate the sample-data INSERT code from a DataFrame
+
+    Emits a ``rows`` list literal and one parameterized ``conn.execute(text(...), ...)``
+    call per chunk_size rows; SQLAlchemy binds the values, so nothing is escaped
+    into the SQL text. Rows are bound one executemany batch at a time, so SQLite's
+    999-variable limit doesn't apply to the batch size.
+    """
+
+    # Format column-by-column (in parallel for wide frames), then stitch each row's values into a tuple literal
+    columns_iter = (df.iloc[:, i] for i in range(df.shape[1]))
+    if df.shape[1] > 1:
+        with ThreadPoolExecutor() as pool:
+            formatted_cols = list(pool.map(_format_py_column, columns_iter))
+    else:
+        formatted_cols = [_format_py_column(col) for col in columns_iter]
+    records = ("(" + reduce(lambda a, b: a + ", " + b, formatted_cols) + ",)").tolist()
+
+    columns = ', '.join(_quote_ident(col) for col in df.columns)
+    keys = tuple(f"p{i}" for i in range(df.shape[1]))
+    placeholders = ', '.join(f":{key}" for key in keys)
+    insert_stmt = f"INSERT INTO {_quote_ident(table_name)} ({columns}) VALUES ({placeholders})"
+
+    insert_statements = []
+    for i in range(0, len(records), chunk_size):
+        rows_str = ',\n    '.join(records[i:i + chunk_size])
+
+        insert_statements.append(f'''rows = [
+    {rows_str}
+]
+conn.execute(
+    text({insert_stmt!r}),
+    [dict(zip({keys!r}, row)) for row in rows]
+)''')
 
     return '\n\n'.join(insert_statements)
 
 
+def optimize_dtypes(df):
+    """
+    Shrink a DataFrame before loading it: downcast integers to the smallest type
+    that fits and floats to float32 where that round-trips exactly.
+    String columns are left alone - bulk_insert binds them as objects anyway.
+    """
+    for i, dtype in enumerate(df.dtypes):
+        values = df.iloc[:, i]
+        kind = dtype.kind if isinstance(dtype, np.dtype) else None
+
+        if kind == 'i':
+            df.isetitem(i, pd.to_numeric(values, downcast='integer'))
+        elif kind == 'u':
+            df.isetitem(i, pd.to_numeric(values, downcast='unsigned'))
+        elif kind == 'f':
+            downcast = values.astype('float32')
+            # Only keep float32 if no value loses precision
+            if (downcast.astype('float64') == values).where(values.notna(), True).all():
+                df.isetitem(i, downcast)
+
+    return df
+
+
+def write_dataframe_to_sqlite(df, db_path, table_name, fresh_file=False):
+    """
+    (Re)create table_name in the SQLite file at db_path and bulk-load df into it
+
+    Uses a plain sqlite3 connection tuned for a one-off bulk load (_BULK_LOAD_PRAGMAS).
+    DROP, CREATE and all inserts run in a single transaction. Pass fresh_file=True
+    only for a new temp file the caller deletes on failure, to drop the journal
+    and fsyncs as well.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(_BULK_LOAD_PRAGMAS)
+        if fresh_file:
+            conn.executescript(_FRESH_FILE_PRAGMAS)
+        conn.execute("BEGIN")
+        conn.execute(f"DROP TABLE IF EXISTS {_quote_ident(table_name)}")
+        conn.execute(generate_create_table_sql(df, table_name))
+        bulk_insert(conn, df, table_name)
+    finally:
+        conn.close()
+
+
+def _clean_column_names(columns):
+    """Column-name cleaning used by create_sqlite_file_directly"""
+    return [str(col).replace(' ', '_').replace('-', '_').replace('.', '_') for col in columns]
+
+
+def _csv_to_sqlite_native(file_path, db_path, table_name, sample_size):
+    """
+    Load a CSV straight into SQLite through the csv virtual-table extension,
+    without building a DataFrame. Returns the number of rows written, or None
+    when the extension can't be loaded (the caller then falls back to pandas).
+
+    Columns get NUMERIC affinity so numbers are stored as INTEGER/REAL and
+    empty fields become NULL, like the pandas path.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            conn.enable_load_extension(True)
+            conn.load_extension("csv")
+            conn.enable_load_extension(False)
+        except (AttributeError, sqlite3.Error):
+            return None
+
+        conn.executescript(_BULK_LOAD_PRAGMAS)
+        filename = str(file_path).replace("'", "''")
+        conn.execute(f"CREATE VIRTUAL TABLE temp.csv_src USING csv(filename='{filename}', header=YES)")
+
+        source = [row[1] for row in conn.execute("PRAGMA temp.table_info(csv_src)")]
+        target = _clean_column_names(source)
+        select_list = ', '.join(f"NULLIF({_quote_ident(src)}, '')" for src in source)
+        (total,) = conn.execute("SELECT COUNT(*) FROM temp.csv_src").fetchone()
+
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {_quote_ident(table_name)}")
+            conn.execute(
+                f"CREATE TABLE {_quote_ident(table_name)} ("
+                + ', '.join(f"{_quote_ident(col)} NUMERIC" for col in target) + ")"
+            )
+            insert_sql = f"INSERT INTO {_quote_ident(table_name)} SELECT {select_list} FROM temp.csv_src"
+            if total > sample_size:
+                conn.execute(f"{insert_sql} ORDER BY random() LIMIT ?", (sample_size,))
+            else:
+                conn.execute(insert_sql)
+
+        conn.execute("DROP TABLE temp.csv_src")
+        return min(total, sample_size)
+    finally:
+        conn.close()
+
+
 def create_sqlite_file_directly(file_path, output_db_path, table_name="data", sample_size=1000):
     """
     Create a SQLite database file directly from CSV/JSON
     This creates a file you can upload to the "SQLite (File Upload)" option
     """
 
+    # CSV: let SQLite parse the file itself when the csv extension is available
+    if file_path.endswith('.csv'):
+        rows = _csv_to_sqlite_native(file_path, output_db_path, table_name, sample_size)
+        if rows is not None:
+            print(f"SQLite database created: {output_db_path}")
+            print(f"Table name: {table_name}")
+            print(f"Records: {rows}")
+            return output_db_path
+
     # Read the file
     if file_path.endswith('.csv'):
         df = pd.read_csv(file_path)
     elif file_path.endswith('.json'):
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = from_json(f.read())
         if isinstance(data, list):
-            df = pd.DataFrame(data)
+            df = records_to_dataframe(data)
         else:
             df = pd.DataFrame([data])
     else:
@@ -221,12 +442,11 @@ def create_sqlite_file_directly(file_path, output_db_path, table_name="data", sa
         print(f"Sampled {sample_size} rows")
 
     # Clean column names
-    df.columns = [col.replace(' ', '_').replace('-', '_').replace('.', '_')
-                  for col in df.columns]
+    df.columns = _clean_column_names(df.columns)
+    df = optimize_dtypes(df)
 
     # Create SQLite database
-    engine = create_engine(f'sqlite:///{output_db_path}')
-    df.to_sql(table_name, engine, if_exists='replace', index=False)
+    write_dataframe_to_sqlite(df, output_db_path, table_name)
 
     print(f"SQLite database created: {output_db_path}")
     print(f"Table name: {table_name}")
@@ -235,6 +455,104 @@ def create_sqlite_file_directly(file_path, output_db_path, table_name="data", sa
     return output_db_path
 
 
+def read_csv_bytes(content):
+    """
+    Parse CSV bytes into a DataFrame with pyarrow.csv (no str decode / StringIO copy)
+
+    pyarrow infers timestamp, time and date columns; bulk_insert writes those
+    back out as ISO strings.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    table = pacsv.read_csv(pa.BufferReader(content))
+    # Free each Arrow column as soon as it has been converted, so the table and
+    # the DataFrame are never both fully resident
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def preview_csv_bytes(content, num_rows=5):
+    """Return the first num_rows of CSV bytes, reading only the first 256 KiB block"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    reader = pacsv.open_csv(pa.BufferReader(content),
+                            read_options=pacsv.ReadOptions(block_size=256 * 1024))
+    try:
+        batch = reader.read_next_batch()
+    except StopIteration:
+        # Header only
+        return reader.schema.empty_table().to_pandas()
+    return batch.slice(0, num_rows).to_pandas()
+
+
+def csv_shape_bytes(content):
+    """Row count and header of CSV bytes without parsing the body (newline count + csv.reader on line 1)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    header_end = content.find(b'\n')
+    header = content if header_end == -1 else content[:header_end]
+    column_names = next(csv.reader([header.decode('utf-8-sig').rstrip('\r')]), [])
+    rows = content.count(b'\n') - 1
+    if content and not content.endswith(b'\n'):
+        # Last line has no trailing newline
+        rows += 1
+    return max(rows, 0), column_names
+
+
+def _json_head_records(text, num_rows):
+    """
+    Decode only the first num_rows elements of a top-level JSON array.
+    Returns None when the document is not an array so callers can fall back to json.loads.
+    """
+    decoder = json.JSONDecoder()
+    ws = ' \t\n\r'
+    pos = len(text) - len(text.lstrip(ws + '\ufeff'))
+    if not text.startswith('[', pos):
+        return None
+    pos += 1
+    records = []
+    while len(records) < num_rows:
+        while pos < len(text) and text[pos] in ws + ',':
+            pos += 1
+        if pos >= len(text) or text[pos] == ']':
+            break
+        record, pos = decoder.raw_decode(text, pos)
+        records.append(record)
+    return records
+
+
+@st.cache_resource(hash_funcs={UploadedFile: upload_key}, max_entries=4, show_spinner=False)
+def _parse_upload(uploaded_file):
+    """
+    Parse an uploaded CSV/JSON file into a DataFrame once per upload.
+    get_file_info, preview_uploaded_file and create_sqlite_from_uploaded_file share the result.
+
+    A resource cache, so the frame is shared rather than pickled into the cache and
+    unpickled per call - callers must not modify it in place.
+    """
+    if uploaded_file.name.endswith('.csv'):
+        # Parse the raw bytes with Arrow's multithreaded CSV reader
+        return read_csv_bytes(uploaded_file.getvalue())
+
+    if not uploaded_file.name.endswith('.json'):
+        raise ValueError(f"Unsupported file type: {uploaded_file.name}")
+
+    # Parse JSON straight from bytes with pydantic-core's Rust parser (no utf-8 decode copy)
+    json_data = from_json(uploaded_file.getvalue())
+
+    # Convert JSON to DataFrame
+    if isinstance(json_data, list):
+        return records_to_dataframe(json_data)
+    if isinstance(json_data, dict):
+        # If it's a dict, try to find the main data array
+        if len(json_data) == 1:
+            key = list(json_data.keys())[0]
+            if isinstance(json_data[key], list):
+                return records_to_dataframe(json_data[key])
+            return pd.DataFrame([json_data[key]])
+        return pd.DataFrame([json_data])
+    raise ValueError("Unsupported JSON structure")
+
+
 def create_sqlite_from_uploaded_file(uploaded_file, table_name="data", sample_size=None):
     """
     Convert Streamlit uploaded CSV/JSON file to SQLite database
@@ -254,51 +572,8 @@ def create_sqlite_from_uploaded_file(uploaded_file, table_name="data", sample_si
     temp_db.close()
 
     try:
-        # Reset file pointer to beginning
-        uploaded_file.seek(0)
-
-        # Read the uploaded file based on its type
-        if uploaded_file.name.endswith('.csv'):
-            # Read CSV from uploaded file using StringIO
-            content = uploaded_file.read()
-
-            # Handle both bytes and string content
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
-
-            # Create StringIO object for pandas
-            csv_buffer = io.StringIO(content)
-            df = pd.read_csv(csv_buffer)
-
-        elif uploaded_file.name.endswith('.json'):
-            # Read JSON from uploaded file
-            content = uploaded_file.read()
-
-            # Handle both bytes and string content
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
-
-            # Parse JSON
-            json_data = json.loads(content)
-
-            # Convert JSON to DataFrame
-            if isinstance(json_data, list):
-                df = pd.DataFrame(json_data)
-            elif isinstance(json_data, dict):
-                # If it's a dict, try to find the main data array
-                if len(json_data) == 1:
-                    key = list(json_data.keys())[0]
-                    if isinstance(json_data[key], list):
-                        df = pd.DataFrame(json_data[key])
-                    else:
-                        df = pd.DataFrame([json_data[key]])
-                else:
-                    df = pd.DataFrame([json_data])
-            else:
-                raise ValueError("Unsupported JSON structure")
-
-        else:
-            raise ValueError(f"Unsupported file type: {uploaded_file.name}")
+        # Parsed once per upload; the cached frame is shared, so rename/downcast a shallow copy
+        df = _parse_upload(uploaded_file).copy(deep=False)
 
         print(f"Original data shape: {df.shape}")
 
@@ -311,46 +586,12 @@ def create_sqlite_from_uploaded_file(uploaded_file, table_name="data", sample_si
             df = df.sample(n=sample_size, random_state=42)
             print(f"Sampled {sample_size} rows from {len(df)} total rows")
 
-        # Clean column names (remove spaces, special characters)
+        # Clean column names (special characters -> '_', collapse runs, fall back for empty names)
         df.columns = [
-            str(col).replace(' ', '_')
-            .replace('-', '_')
-            .replace('.', '_')
-            .replace('(', '_')
-            .replace(')', '_')
-            .replace('/', '_')
-            .replace('\\', '_')
-            .replace('[', '_')
-            .replace(']', '_')
-            .replace('{', '_')
-            .replace('}', '_')
-            .replace(':', '_')
-            .replace(';', '_')
-            .replace(',', '_')
-            .replace('?', '_')
-            .replace('!', '_')
-            .replace('@', '_')
-            .replace('#', '_')
-            .replace('$', '_')
-            .replace('%', '_')
-            .replace('^', '_')
-            .replace('&', '_')
-            .replace('*', '_')
-            .replace('+', '_')
-            .replace('=', '_')
-            .replace('|', '_')
-            for col in df.columns
+            _COL_RUN.sub('_', _COL_BAD.sub('_', str(col))).strip('_') or f"column_{i}"
+            for i, col in enumerate(df.columns)
         ]
 
-        # Clean up column names (remove consecutive underscores and trailing underscores)
-        df.columns = [
-            '_'.join([part for part in col.split('_') if part])  # Remove empty parts
-            for col in df.columns
-        ]
-
-        # Handle empty column names
-        df.columns = [f"column_{i}" if col == "" else col for i, col in enumerate(df.columns)]
-
         # Remove any duplicate column names
         seen_columns = set()
         new_columns = []
@@ -368,10 +609,10 @@ def create_sqlite_from_uploaded_file(uploaded_file, table_name="data", sample_si
                 seen_columns.add(col)
 
         df.columns = new_columns
+        df = optimize_dtypes(df)
 
         # Create SQLite database and insert data
-        engine = create_engine(f'sqlite:///{temp_db_pth}')
-        df.to_sql(table_name, engine, if_exists='replace', index=False)
+        write_dataframe_to_sqlite(df, temp_db_pth, table_name, fresh_file=True)
 
         print(f"SQLite database created: {temp_db_pth}")
         print(f"Table name: {table_name}")
@@ -396,53 +637,23 @@ def get_file_info(uploaded_file):
         uploaded_file.seek(0)
 
         if uploaded_file.name.endswith('.csv'):
-            # Read CSV content
-            content = uploaded_file.read()
-
-            # Handle both bytes and string content
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
+            # Count lines and sniff the header instead of parsing the whole file
+            rows, column_names = csv_shape_bytes(uploaded_file.read())
 
             # Reset file pointer for other operations
             uploaded_file.seek(0)
 
-            # Create StringIO object for pandas
-            csv_buffer = io.StringIO(content)
-            df = pd.read_csv(csv_buffer)
-
             return {
                 'type': 'CSV',
-                'rows': len(df),
-                'columns': len(df.columns),
-                'column_names': list(df.columns),
+                'rows': rows,
+                'columns': len(column_names),
+                'column_names': column_names,
                 'size_mb': uploaded_file.size / (1024 * 1024)
             }
 
         elif uploaded_file.name.endswith('.json'):
-            # Read JSON content
-            content = uploaded_file.read()
-
-            # Handle both bytes and string content
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
-
-            # Reset file pointer for other operations
-            uploaded_file.seek(0)
-
-            # Parse JSON
-            json_data = json.loads(content)
-
-            if isinstance(json_data, list):
-                df = pd.DataFrame(json_data)
-            elif isinstance(json_data, dict):
-                if len(json_data) == 1:
-                    key = list(json_data.keys())[0]
-                    if isinstance(json_data[key], list):
-                        df = pd.DataFrame(json_data[key])
-                    else:
-                        df = pd.DataFrame([json_data[key]])
-                else:
-                    df = pd.DataFrame([json_data])
+            # Shares the parse with the conversion step
+            df = _parse_upload(uploaded_file)
 
             return {
                 'type': 'JSON',
@@ -469,21 +680,13 @@ def preview_uploaded_file(uploaded_file, num_rows=5):
         uploaded_file.seek(0)
 
         if uploaded_file.name.endswith('.csv'):
-            # Read CSV content
-            content = uploaded_file.read()
-
-            # Handle both bytes and string content
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
+            # Only parse the first block of the file - enough for a handful of rows
+            df = preview_csv_bytes(uploaded_file.read(), num_rows)
 
             # Reset file pointer for other operations
             uploaded_file.seek(0)
 
-            # Create StringIO object for pandas
-            csv_buffer = io.StringIO(content)
-            df = pd.read_csv(csv_buffer)
-
-            return df.head(num_rows)
+            return df
 
         elif uploaded_file.name.endswith('.json'):
             # Read JSON content
@@ -496,22 +699,13 @@ def preview_uploaded_file(uploaded_file, num_rows=5):
             # Reset file pointer for other operations
             uploaded_file.seek(0)
 
-            # Parse JSON
-            json_data = json.loads(content)
-
-            if isinstance(json_data, list):
-                df = pd.DataFrame(json_data)
-            elif isinstance(json_data, dict):
-                if len(json_data) == 1:
-                    key = list(json_data.keys())[0]
-                    if isinstance(json_data[key], list):
-                        df = pd.DataFrame(json_data[key])
-                    else:
-                        df = pd.DataFrame([json_data[key]])
-                else:
-                    df = pd.DataFrame([json_data])
-
-            return df.head(num_rows)
+            # Top-level arrays: decode only the records we show
+            records = _json_head_records(content, num_rows)
+            if records is not None:
+                return records_to_dataframe(records)
+
+            # Object documents need the full parse, which the conversion step reuses
+            return _parse_upload(uploaded_file).head(num_rows)
 
     except Exception as e:
         return f"Error previewing file: {str(e)}"
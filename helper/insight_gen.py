@@ -5,18 +5,58 @@ from cohere import ClientV2
 import pandas as pd
 from typing import Optional, Dict, Any, dataclass_transform
 import json
+from collections import deque
+
+# Chat turns kept in session state; older ones are evicted on append
+MAX_AI_MESSAGES = 20
+
+@st.cache_resource(show_spinner=False)
+def _get_cohere_client(api_key: str) -> ClientV2:
+    """One Cohere client per API key, so its HTTP connection pool survives reruns"""
+    return ClientV2(api_key)
+
+# System prompt per response_type
+SYSTEM_MESSAGES = {
+    "query_explanation": """
+    You are a SQL expert assistant. Explain SQL queries in a clear, educational manner.
+    Focus on:
+    - What the query does
+    - Key SQL concepts used
+    - Potential optimizations
+    - Expected results
+    """,
+    "query_generation": """
+    You are a SQL query generator. Create SQL queries based on user requirements.
+    Always:
+    - Write syntactically correct SQL
+    - Use appropriate database-specific syntax
+    - Include comments for complex logic
+    - Suggest alternative approaches when relevant
+    """,
+    "data_insights": """
+    You are a data analyst. Provide insights about datasets and query results.
+    Focus on:
+    - Data patterns and trends
+    - Potential data quality issues
+    - Suggested analyses
+    - Business implications
+    """,
+    "general": """
+    You are a helpful SQL and data analysis assistant. Provide clear, 
+    actionable responses based on the context provided.
+    """
+}
 
 class SQLInsightGenerator:
     def __init__(self, API_KEY: str):
-        self.client = ClientV2(API_KEY) if API_KEY else None
+        self.client = _get_cohere_client(API_KEY) if API_KEY else None
         self.initialize_session_state()
 
     def initialize_session_state(self):
         """Iniitialize all session state variables"""
-        if 'contextual_counter' not in st.session_state:
-            st.session_state.contextual_counter = 0
-        if 'ai_messages' not in st.session_state:
-            st.session_state.ai_messages = []
+        if not isinstance(st.session_state.get('ai_messages'), deque):
+            st.session_state.ai_messages = deque(st.session_state.get('ai_messages', ()),
+                                                 maxlen=MAX_AI_MESSAGES)
         if 'current_context' not in st.session_state:
             st.session_state.current_context = {}
 
@@ -33,111 +73,114 @@ class SQLInsightGenerator:
         }
 
         if dataframe is not None and not dataframe.empty:
-            context['data_summary'] = {
-                'shape': dataframe.shape,
-                'columns': list(dataframe.columns),
-                'dtypes': dataframe.dtypes.to_dict(),
-                'sample_data': dataframe.head(3).to_dict('records') if len(dataframe) > 0 else []
-            }
+            context['data_summary'] = self._summarize_dataframe(dataframe)
 
         st.session_state.current_context = context
 
+    def _summarize_dataframe(self, dataframe: pd.DataFrame) -> Dict[str, Any]:
+        """Data summary for the prompt, reused while the same frame is passed in again"""
+        key = (dataframe.shape, tuple(dataframe.columns))
+        cached = st.session_state.get('data_summary_cache')
+        # Identity check against the cached frame itself, so a recycled id() can't match
+        if cached is not None and cached[0] is dataframe and cached[1] == key:
+            return cached[2]
+
+        summary = {
+            'shape': dataframe.shape,
+            'columns': list(dataframe.columns),
+            # Serialized once here; the prompt embeds the string as-is
+            'sample_data_json': dataframe.head(2).to_json(orient='records', date_format='iso', indent=2)
+        }
+        st.session_state.data_summary_cache = (dataframe, key, summary)
+        return summary
+
     def generate_response(self,
                           prompt: str,
-                          response_type: str = "general") -> str:
-        """Generate an AI response based on prompt"""
+                          response_type: str = "general",
+                          stream: bool = False) -> str:
+        """
+        Generate an AI response based on prompt.
+        With stream=True the response is written to the page token by token
+        (errors included) and the full text is returned.
+        """
         if not self.client:
-            return "❌ API key not provided. Please enter a valid Cohere API key."
+            return self._error("❌ API key not provided. Please enter a valid Cohere API key.", stream)
 
         try:
-            system_messages = {
-                "query_explanation": """
-                You are a SQL expert assistant. Explain SQL queries in a clear, educational manner.
-                Focus on:
-                - What the query does
-                - Key SQL concepts used
-                - Potential optimizations
-                - Expected results
-                """,
-                "query_generation": """
-                You are a SQL query generator. Create SQL queries based on user requirements.
-                Always:
-                - Write syntactically correct SQL
-                - Use appropriate database-specific syntax
-                - Include comments for complex logic
-                - Suggest alternative approaches when relevant
-                """,
-                "data_insights": """
-                You are a data analyst. Provide insights about datasets and query results.
-                Focus on:
-                - Data patterns and trends
-                - Potential data quality issues
-                - Suggested analyses
-                - Business implications
-                """,
-                "general": """
-                You are a helpful SQL and data analysis assistant. Provide clear, 
-                actionable responses based on the context provided.
-                """
-            }
-
-            system_message = system_messages.get(response_type, system_messages["general"])
-
-            # Build Context information
-            context_info = ""
-            if st.session_state.current_context:
-                ctx = st.session_state.current_context
-                context_info = f"""
-                
-                Current context: :
-                - Database Type: {ctx.get('db_type', 'Unknown')}
-                - Last Query: {ctx.get('last_query', 'None')}
-                """
-
-                if 'data_summary' in ctx:
-                    ds = ctx['data_summary']
-                    context_info += f"""
-                    
-                    - Dataset Shape: {ds['shape']} (rows, columns)
-                    - Columns: {', '.join(ds['columns'])}
-                    - Sample Data: {json.dumps(ds['sample_data'][:2], indent=2)}
-                    """
-
-            full_propmt = f"{system_message}\n\n{context_info}\n\nUser Query: {prompt}"
-
-            # Manage conversation history
-            self._manage_conversation_history()
+            full_propmt = f"{self._prompt_prefix(response_type)}\n\nUser Query: {prompt}"
 
             # Add current message
             st.session_state.ai_messages.append({"role": "user", "content": prompt})
 
             # Prep. message for API
-            messages = [{"role": "user", "content": full_propmt}] + st.session_state.ai_messages[-4:] #Limited to the last 4 messages
+            messages = [{"role": "user", "content": full_propmt}] + list(st.session_state.ai_messages)[-4:] #Limited to the last 4 messages
 
-            response = self.client.chat(
+            chat_kwargs = dict(
                 model="command-a-03-2025",
                 messages=messages,
                 max_tokens=1000,
                 temperature=0.3
             )
 
-            assistant_response = response.message.content[0].text
+            if stream:
+                # Show tokens as they arrive; write_stream returns the concatenated text
+                assistant_response = st.write_stream(
+                    event.delta.message.content.text
+                    for event in self.client.chat_stream(**chat_kwargs)
+                    if event.type == "content-delta"
+                )
+            else:
+                response = self.client.chat(**chat_kwargs)
+                assistant_response = response.message.content[0].text
             st.session_state.ai_messages.append({"role": "assistant", "content": assistant_response})
 
             return assistant_response
 
         except Exception as e:
-            return f"❌ Error generating response: {str(e)}"
+            return self._error(f"❌ Error generating response: {str(e)}", stream)
 
-    def _manage_conversation_history(self):
-        """Manage conversation history to prevent token overflow"""
-        st.session_state.contextual_counter += 1
+    def _prompt_prefix(self, response_type: str) -> str:
+        """
+        System message + context block for the prompt. Cached per response type
+        until update_context swaps in a new context dict.
+        """
+        ctx = st.session_state.current_context
+        cache = st.session_state.setdefault('prompt_prefix_cache', {})
+        cached = cache.get(response_type)
+        if cached is not None and cached[0] is ctx:
+            return cached[1]
+
+        system_message = SYSTEM_MESSAGES.get(response_type, SYSTEM_MESSAGES["general"])
+
+        # Build Context information
+        context_info = ""
+        if ctx:
+            context_info = f"""
+
+            Current context: :
+            - Database Type: {ctx.get('db_type', 'Unknown')}
+            - Last Query: {ctx.get('last_query', 'None')}
+            """
+
+            if 'data_summary' in ctx:
+                ds = ctx['data_summary']
+                context_info += f"""
+
+                - Dataset Shape: {ds['shape']} (rows, columns)
+                - Columns: {', '.join(ds['columns'])}
+                - Sample Data: {ds['sample_data_json']}
+                """
+
+        prefix = f"{system_message}\n\n{context_info}"
+        cache[response_type] = (ctx, prefix)
+        return prefix
 
-        # Reset every 10 interactions
-        if st.session_state.contextual_counter >= 10:
-            st.session_state.ai_messages = st.session_state.ai_messages[-2:] #keep last 2
-            st.session_state.contextual_counter = 0
-            st.info("🔄 Chat history trimmed to maintain performance")
+    @staticmethod
+    def _error(message: str, stream: bool) -> str:
+        """Streaming callers don't render the return value, so show the error here"""
+        if stream:
+            st.markdown(message)
+        return message
 
     def generate_sql_query(self,
                            natural_language_query: str,
@@ -164,19 +207,19 @@ class SQLInsightGenerator:
         prompt = f"Please explain this SQL query step by step:\n\n{sql_query}"
         return self.generate_response(prompt, "query_explanation")
 
-    def analyze_data(self, dataframe: pd.DataFrame, analysis_request: str = "") -> str:
+    def analyze_data(self, dataframe: pd.DataFrame, analysis_request: str = "", stream: bool = False) -> str:
         """Analyze dataframe and provide insights"""
         if analysis_request:
             prompt = f"Based on the provided dataset, please: {analysis_request}"
         else:
             prompt = "Please analyze this dataset and provide key insights, patterns, and recommendations."
 
-        return self.generate_response(prompt, "data_insights")
+        return self.generate_response(prompt, "data_insights", stream=stream)
 
-    def suggest_visualizations(self, dataframe: pd.DataFrame) -> str:
+    def suggest_visualizations(self, dataframe: pd.DataFrame, stream: bool = False) -> str:
         """Suggest appropriate visualizations for the data"""
         prompt = "Based on the dataset structure and data types, suggest appropriate charts and visualizations that would be most effective for exploring this data."
-        return self.generate_response(prompt, "data_insights")
+        return self.generate_response(prompt, "data_insights", stream=stream)
 
 def display_chat_history():
     """Display chat history in sidebar"""
@@ -185,22 +228,18 @@ def display_chat_history():
 
         with st.sidebar:
             # Show last 6 messages
-            recent_messages = st.session_state.ai_messages[-6:]
+            recent_messages = list(st.session_state.ai_messages)[-6:]
 
             for i, msg in enumerate(recent_messages):
                 with st.expander(f"{'🧑' if msg['role'] == 'user' else '🤖'} "
                                          f"{msg['role'].title()} {i+1}"):
                     st.write(msg['content'][:200] + "..." if len(msg['content']) > 200 else msg['content'])
 
-            # Clear history button with timestamp-based unique key
-            import time
-            clear_key = f"clear_chat_{int(time.time() * 1000)}"
-
+            # Stable key: the button keeps its widget identity across reruns
             if st.button("Clear Chat History",
-                         key=clear_key, #f"clear_chat_{id(st.session_state.ai_messages)}",  # Make key unique
+                         key="clear_chat_btn",
                          icon="🗑"):
-                st.session_state.ai_messages = []
-                st.session_state.contextual_counter = 0
+                st.session_state.ai_messages.clear()
                 st.rerun()
 
 def create_sample_data_for_testing():
@@ -0,0 +1,41 @@
+import re
+
+# Statements routed to the cached read-only path (checked against the upper-cased head only)
+_READ_PREFIXES = ('SELECT', 'SHOW', 'DESCRIBE', 'PRAGMA', 'WITH', 'EXPLAIN')
+# A WITH ... statement is only a read if its body has no data-modifying statement
+_DML = re.compile(r'\b(?:INSERT|UPDATE|DELETE|MERGE)\b', re.IGNORECASE)
+# PRAGMA name = value / PRAGMA name(value): sets a value unless it's one of the
+# pragmas whose argument only selects what to report
+_PRAGMA_ARG = re.compile(r'^\s*PRAGMA\s+(?:\w+\.)?(\w+)\s*(=|\()', re.IGNORECASE)
+_PRAGMA_QUERIES = frozenset({
+    'table_info', 'table_xinfo', 'table_list', 'index_info', 'index_xinfo', 'index_list',
+    'foreign_key_list', 'foreign_key_check', 'integrity_check', 'quick_check',
+})
+
+# Random, UUID and current-time functions across SQLite/PostgreSQL/MySQL/SQL Server,
+# plus SQLite's 'now' time-value argument: results change on every run
+_VOLATILE = re.compile(
+    r"\b(?:RANDOM|RAND|RANDOMBLOB|NEWID|UUID|GEN_RANDOM_UUID|NOW|GETDATE|GETUTCDATE|"
+    r"SYSDATETIME|CLOCK_TIMESTAMP|UNIX_TIMESTAMP|UTC_TIMESTAMP|CURDATE|CURTIME|SYSDATE)\s*\("
+    r"|\b(?:CURRENT_TIMESTAMP|CURRENT_DATE|CURRENT_TIME|LOCALTIMESTAMP|LOCALTIME)\b"
+    r"|'now'",
+    re.IGNORECASE,
+)
+
+
+def is_read_query(q: str) -> bool:
+    """True if q returns rows without modifying data (CTEs wrapping DML and PRAGMA assignments are writes)"""
+    head = q.lstrip()[:16].upper()
+    if not head.startswith(_READ_PREFIXES):
+        return False
+    if head.startswith('WITH'):
+        return not _DML.search(q)
+    if head.startswith('PRAGMA'):
+        arg = _PRAGMA_ARG.match(q)
+        return not arg or (arg.group(2) == '(' and arg.group(1).lower() in _PRAGMA_QUERIES)
+    return True
+
+
+def is_volatile_query(q: str) -> bool:
+    """True if q calls a random or current-time function, so its result must not be cached"""
+    return _VOLATILE.search(q) is not None
@@ -0,0 +1,3 @@
+def upload_key(f):
+    """Cache key for an upload; file_id changes whenever a new file is uploaded"""
+    return getattr(f, 'file_id', None), f.name, f.size
@@ -6,43 +6,202 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from typing import List, Dict, Any
+from itertools import combinations
+
+
+# Above this many rows categorical cardinality is estimated from a sample of this size
+MAX_CARDINALITY_ROWS = 1_000_000
+# Above this many points, draw with WebGL / without per-point glyphs
+WEBGL_THRESHOLD = 5_000
+# Line charts keep the min and max of this many buckets per series
+LINE_BUCKETS = 2_000
+# Correlations for display are computed on a random sample of at most this many rows
+MAX_CORR_ROWS = 50_000
+
+
+def _corr_for_viz(df: pd.DataFrame, numeric_cols: pd.Index, max_rows: int = MAX_CORR_ROWS):
+    """
+    Correlation matrix for plotting. Tall frames are sampled first - a 2-decimal
+    heatmap doesn't need every row. Returns (corr_matrix, sampled_rows or None).
+    """
+    if len(df) > max_rows:
+        return df[numeric_cols].sample(n=max_rows, random_state=0).corr(), max_rows
+    return df[numeric_cols].corr(), None
+
+
+def _stats_and_corr(arr: np.ndarray):
+    """
+    Column means and pairwise-complete Pearson correlations of a 2-D float array
+    from one set of moment products (a few BLAS gemms over a single read of the
+    data) instead of separate describe() and corr() scans.
+    Values are shifted by a rough per-column centre first so the moments stay
+    well conditioned; that also makes a float32 input (single-precision gemm,
+    half the bytes) accurate enough for display. The small K x K moment
+    matrices are finished in float64. Returns (means, corr).
+    """
+    finite = np.isfinite(arr)
+
+    # Rough centre per column from the first rows
+    head, head_ok = arr[:1024], finite[:1024]
+    shift = (np.where(head_ok, head, 0).sum(0) / np.maximum(head_ok.sum(0), 1)).astype(arr.dtype)
+
+    x = np.where(finite, arr - shift, 0).astype(arr.dtype, copy=False)
+    w = finite.astype(arr.dtype)
+
+    n = (w.T @ w).astype(np.float64)         # n[i, j]: rows where columns i and j are both present
+    s = (x.T @ w).astype(np.float64)         # s[i, j]: sum of column i over those rows
+    ss = ((x * x).T @ w).astype(np.float64)
+    cp = (x.T @ x).astype(np.float64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s / n
+        var = ss / n - mean ** 2
+        corr = (cp / n - mean * mean.T) / np.sqrt(var * var.T)
+        means = np.diag(mean) + shift.astype(np.float64)
+
+    return means, np.clip(corr, -1.0, 1.0)
+
+
+def _minmax_indices(y: np.ndarray, n_buckets: int = LINE_BUCKETS) -> np.ndarray:
+    """
+    Positions to keep when drawing y as a line: the min and max of each of
+    n_buckets equal slices (plus the endpoints), so peaks and dips survive
+    decimation. Short series are returned whole.
+    """
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+
+    size = n // n_buckets
+    body = y[:size * n_buckets].reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    # NaNs never win min/max
+    lows = np.argmin(np.where(np.isnan(body), np.inf, body), axis=1) + offsets
+    highs = np.argmax(np.where(np.isnan(body), -np.inf, body), axis=1) + offsets
+    tail = np.arange(size * n_buckets, n)
+    return np.unique(np.concatenate(([0, n - 1], lows, highs, tail)))
+
+
+def _add_traces(fig: go.Figure, placed: List[tuple]) -> go.Figure:
+    """Add (trace, row, col) triples to a subplot figure in one add_traces call"""
+    if placed:
+        traces, rows, cols = zip(*placed)
+        fig.add_traces(list(traces), rows=list(rows), cols=list(cols))
+    return fig
+
+
+def _top_counts(series: pd.Series, k: int) -> pd.Series:
+    """The k most frequent values with their counts, without sorting the whole count table"""
+    return series.value_counts(sort=False).nlargest(k)
+
+
+def _null_counts(df: pd.DataFrame, numeric_mask: np.ndarray, numeric_arr: np.ndarray) -> pd.Series:
+    """
+    Per-column null counts. Numeric columns are counted with a vectorized
+    np.isnan over the float matrix already built for the summary; only the
+    remaining columns go through pandas' isna.
+    """
+    counts = np.empty(df.shape[1], dtype=np.int64)
+    counts[numeric_mask] = np.isnan(numeric_arr).sum(0)
+    other = ~numeric_mask
+    if other.any():
+        counts[other] = df.iloc[:, other].isna().sum().to_numpy()
+    return pd.Series(counts, index=df.columns)
 
 
 class DataVisualizer:
     def __init__(self):
         self.color_palette = px.colors.qualitative.Set3
+        # name -> (dataframe, key, result) for the last frame each result was computed on
+        self._frame_cache = {}
+
+    def _per_frame(self, name: str, df: pd.DataFrame, compute):
+        """Run compute() once per frame; reruns hand the same DataFrame back"""
+        key = (df.shape, tuple(df.columns))
+        cached = self._frame_cache.get(name)
+        if cached is not None and cached[0] is df and cached[1] == key:
+            return cached[2]
+
+        result = compute()
+        self._frame_cache[name] = (df, key, result)
+        return result
+
+    def _numeric_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Boolean mask of df's numeric columns, computed once per frame"""
+        return self._per_frame('numeric_mask', df,
+                               lambda: np.array([dtype.kind in 'iufc' for dtype in df.dtypes], dtype=bool))
+
+    def _numeric_cols(self, df: pd.DataFrame) -> pd.Index:
+        """Numeric column labels of df"""
+        return df.columns[self._numeric_mask(df)]
+
+    def _summary_stats(self, df: pd.DataFrame):
+        """(means, corr, null_counts) for the summary figure, computed once per frame"""
+        def compute():
+            mask = self._numeric_mask(df)
+            # float32 halves the bytes the moment gemms stream through
+            numeric_arr = df.iloc[:, mask].to_numpy(dtype=np.float32, na_value=np.nan)
+            means, corr = _stats_and_corr(numeric_arr)
+            return means, corr, _null_counts(df, mask, numeric_arr)
+
+        return self._per_frame('summary_stats', df, compute)
 
     def analyze_dataframe_for_viz(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze dataframe to suggest appropriate visualizations"""
         if df.empty:
             return {"error": "DataFrame is empty"}
 
+        # Reruns pass the same frame again - reuse the previous analysis
+        return self._per_frame('analysis', df, lambda: self._analyze(df))
+
+    def _analyze(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Column classification and cardinality for analyze_dataframe_for_viz"""
+        # Classify the non-numeric columns in one walk over the dtypes
+        categorical_cols, datetime_cols = [], []
+        categorical_pos = []
+        for i, (col, dtype) in enumerate(df.dtypes.items()):
+            kind = dtype.kind
+            if kind == 'O':
+                categorical_cols.append(col)
+                categorical_pos.append(i)
+            elif kind == 'M':
+                datetime_cols.append(col)
+
         analysis = {
             "shape": df.shape,
-            "numeric_columns": df.select_dtypes(include=[np.number]).columns.tolist(),
-            "categorical_columns": df.select_dtypes(include=['object', 'category']).columns.tolist(),
-            "datetime_columns": df.select_dtypes(include=['datetime64']).columns.tolist(),
+            "numeric_columns": self._numeric_cols(df).tolist(),
+            "categorical_columns": categorical_cols,
+            "datetime_columns": datetime_cols,
             "high_cardinality_cols": [],
-            "low_cardinality_cols": []
+            "low_cardinality_cols": [],
+            "cardinality_estimated": False
         }
 
-        # Analyze cardinality
-        for col in analysis["categorical_columns"]:
-            unique_count = df[col].nunique()
-            if unique_count > 20:
-                analysis["high_cardinality_cols"].append(col)
-            else:
-                analysis["low_cardinality_cols"].append(col)
+        # Analyze cardinality (one nunique call over all categorical columns)
+        if categorical_cols:
+            categorical_df = df.iloc[:, categorical_pos]
+            if len(df) > MAX_CARDINALITY_ROWS:
+                # Hashing every cell of huge object columns is too slow; a sample is enough
+                # to tell "a handful of categories" from "more than 20"
+                categorical_df = categorical_df.sample(n=MAX_CARDINALITY_ROWS, random_state=0)
+                analysis["cardinality_estimated"] = True
+
+            is_high = (categorical_df.nunique() > 20).to_numpy()
+            analysis["high_cardinality_cols"] = [c for c, high in zip(categorical_cols, is_high) if high]
+            analysis["low_cardinality_cols"] = [c for c, high in zip(categorical_cols, is_high) if not high]
 
         return analysis
 
     def create_summary_stats_viz(self, df: pd.DataFrame) -> go.Figure:
         """Create summary statistics visualization"""
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        numeric_cols = self._numeric_cols(df)
 
         if len(numeric_cols) == 0:
             return None
 
+        # Means, correlations and null counts from one pass over the numeric data
+        means, corr, null_counts = self._summary_stats(df)
+
         fig = make_subplots(
             rows=2, cols=2,
             subplot_titles=('Distribution Overview', 'Correlation Matrix',
@@ -51,35 +210,28 @@ class DataVisualizer:
                    [{"type": "bar"}, {"type": "table"}]]
         )
 
+        # Plain ndarrays validate much faster in plotly than pandas Index/Series
+        labels = numeric_cols.to_numpy()
+
+        # Traces are collected as (trace, row, col) and added in one batch
         # Distribution overview
-        stats_df = df[numeric_cols].describe().T
-        fig.add_trace(
-            go.Bar(x=stats_df.index, y=stats_df['mean'], name='Mean'),
-            row=1, col=1
-        )
+        placed = [(go.Bar(x=labels, y=means, name='Mean'), 1, 1)]
 
         # Correlation matrix (if more than 1 numeric column)
         if len(numeric_cols) > 1:
-            corr_matrix = df[numeric_cols].corr()
-            fig.add_trace(
-                go.Heatmap(z=corr_matrix.values,
-                           x=corr_matrix.columns,
-                           y=corr_matrix.columns,
-                           colorscale='RdBu',
-                           showscale=False),
-                row=1, col=2
-            )
+            placed.append((go.Heatmap(z=corr,
+                                      x=labels,
+                                      y=labels,
+                                      colorscale='RdBu',
+                                      showscale=False), 1, 2))
 
         # Missing values
-        missing_data = df.isnull().sum()
-        missing_data = missing_data[missing_data > 0]
+        missing_data = null_counts[null_counts > 0]
         if len(missing_data) > 0:
-            fig.add_trace(
-                go.Bar(x=missing_data.index, y=missing_data.values,
-                       name='Missing Values'),
-                row=2, col=1
-            )
+            placed.append((go.Bar(x=missing_data.index.to_numpy(), y=missing_data.to_numpy(),
+                                  name='Missing Values'), 2, 1))
 
+        _add_traces(fig, placed)
         fig.update_layout(height=600, showlegend=False,
                           title_text="Dataset Summary Statistics")
         return fig
@@ -97,62 +249,61 @@ class DataVisualizer:
                    [{"type": "bar"}, {"type": "table"}]]
         )
 
-        if df[column].dtype in ['int64', 'float64']:
-            # Histogram
-            fig.add_trace(
-                go.Histogram(x=df[column], name='Distribution'),
-                row=1, col=1
-            )
-
-            # Box plot
-            fig.add_trace(
-                go.Box(y=df[column], name='Box Plot'),
-                row=1, col=2
-            )
-
-            # Summary stats table
-            stats = df[column].describe()
-            fig.add_trace(
-                go.Table(
+        series = df[column]
+        # Any int/uint/float width, nullable or pyarrow-backed, takes the numeric branch
+        if series.dtype.kind in 'iuf':
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+            stats = series.describe()
+            placed = [
+                # Histogram
+                (go.Histogram(x=values, name='Distribution'), 1, 1),
+                # Box plot
+                (go.Box(y=values, name='Box Plot',
+                        # Outlier markers are one SVG node each - skip them on large columns
+                        boxpoints='outliers' if len(values) <= WEBGL_THRESHOLD else False), 1, 2),
+                # Summary stats table
+                (go.Table(
                     header=dict(values=['Statistic', 'Value']),
-                    cells=dict(values=[stats.index, stats.values.round(2)])
-                ),
-                row=2, col=2
-            )
+                    cells=dict(values=[stats.index.to_numpy(), stats.to_numpy().round(2)])
+                ), 2, 2),
+            ]
         else:
             # Value counts for categorical
-            value_counts = df[column].value_counts().head(10)
-            fig.add_trace(
-                go.Bar(x=value_counts.index, y=value_counts.values),
-                row=2, col=1
-            )
+            value_counts = _top_counts(series, 10)
+            placed = [(go.Bar(x=value_counts.index.to_numpy(), y=value_counts.to_numpy()), 2, 1)]
 
+        _add_traces(fig, placed)
         fig.update_layout(height=600, showlegend=False,
                           title_text=f"Distribution Analysis: {column}")
         return fig
 
     def create_correlation_heatmap(self, df: pd.DataFrame) -> go.Figure:
         """Create correlation heatmap for numeric columns"""
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        numeric_cols = self._numeric_cols(df)
 
         if len(numeric_cols) < 2:
             return None
 
-        corr_matrix = df[numeric_cols].corr()
+        corr_matrix, sampled = _corr_for_viz(df, numeric_cols)
+
+        # Rounded once; the 2-decimal values serve as both colour and cell text
+        z = corr_matrix.to_numpy().round(2)
+        labels = corr_matrix.columns.to_numpy()
 
         fig = go.Figure(data=go.Heatmap(
-            z=corr_matrix.values,
-            x=corr_matrix.columns,
-            y=corr_matrix.columns,
+            z=z,
+            x=labels,
+            y=labels,
             colorscale='RdBu',
             zmid=0,
-            text=corr_matrix.round(2).values,
+            text=z,
             texttemplate="%{text}",
             textfont={"size": 10}
         ))
 
         fig.update_layout(
-            title="Correlation Matrix",
+            title=f"Correlation Matrix (sampled {sampled:,} rows)" if sampled else "Correlation Matrix",
             xaxis_tickangle=-45,
             height=600
         )
@@ -160,16 +311,55 @@ class DataVisualizer:
         return fig
 
     def create_scatter_plot(self, df: pd.DataFrame, x_col: str, y_col: str,
-                            color_col: str = None, size_col: str = None) -> go.Figure:
+                            color_col: str = None, size_col: str = None,
+                            hover_data: List[str] = None) -> go.Figure:
         """Create scatter plot with optional color and size dimensions"""
-        fig = px.scatter(
-            df, x=x_col, y=y_col,
-            color=color_col, size=size_col,
-            hover_data=df.columns[:5].tolist(),  # Include first 5 columns in hover
-            title=f"{y_col} vs {x_col}"
-        )
-
-        fig.update_layout(height=500)
+        if hover_data is None:
+            hover_data = df.columns[:5].tolist()  # Include first 5 columns in hover
+
+        # Traces are built from ndarrays directly - plotly express would reshape the
+        # whole frame first. SVG stalls the browser on large point counts, so use WebGL there.
+        trace_cls = go.Scattergl if len(df) > WEBGL_THRESHOLD else go.Scatter
+        x = df[x_col].to_numpy()
+        y = df[y_col].to_numpy()
+        customdata = df[hover_data].to_numpy()
+        hovertemplate = "<br>".join(
+            [f"{x_col}=%{{x}}", f"{y_col}=%{{y}}"]
+            + [f"{col}=%{{customdata[{i}]}}" for i, col in enumerate(hover_data)]
+        ) + "<extra></extra>"
+
+        marker = {}
+        if size_col:
+            sizes = df[size_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            max_size = np.nanmax(sizes) if np.isfinite(sizes).any() else 1.0
+            # Same area scaling as px.scatter (largest marker 20 px)
+            marker.update(size=sizes, sizemode='area', sizeref=2.0 * max_size / 20 ** 2)
+
+        if color_col and df[color_col].dtype.kind in 'iuf':
+            # Continuous colour scale
+            marker.update(color=df[color_col].to_numpy(), colorscale='Plasma',
+                          showscale=True, colorbar=dict(title=color_col))
+            traces = [trace_cls(x=x, y=y, mode='markers', marker=marker,
+                                customdata=customdata, hovertemplate=hovertemplate)]
+        elif color_col:
+            # One trace per category, as px does for discrete colours
+            traces = []
+            for i, (value, pos) in enumerate(df.groupby(color_col, sort=False).indices.items()):
+                group_marker = dict(marker, color=self.color_palette[i % len(self.color_palette)])
+                if 'size' in group_marker:
+                    group_marker['size'] = marker['size'][pos]
+                traces.append(trace_cls(x=x[pos], y=y[pos], mode='markers', name=str(value),
+                                        marker=group_marker, customdata=customdata[pos],
+                                        hovertemplate=hovertemplate))
+        else:
+            traces = [trace_cls(x=x, y=y, mode='markers', marker=marker,
+                                customdata=customdata, hovertemplate=hovertemplate)]
+
+        fig = go.Figure(data=traces)
+        fig.update_layout(title=f"{y_col} vs {x_col}",
+                          xaxis_title=x_col, yaxis_title=y_col,
+                          legend_title_text=color_col,
+                          height=500)
         return fig
 
     def create_bar_chart(self, df: pd.DataFrame, x_col: str, y_col: str = None,
@@ -177,17 +367,19 @@ class DataVisualizer:
         """Create bar chart"""
         if y_col is None:
             # Count plot
-            value_counts = df[x_col].value_counts().head(20)
+            value_counts = _top_counts(df[x_col], 20)
             fig = px.bar(
-                x=value_counts.index, y=value_counts.values,
+                x=value_counts.index.to_numpy(), y=value_counts.to_numpy(),
                 title=f"Count of {x_col}",
                 labels={'x': x_col, 'y': 'Count'}
             )
         else:
-            # Aggregated bar chart
-            agg_data = df.groupby(x_col)[y_col].mean().head(20)
+            # Aggregated bar chart over the 20 most frequent categories only
+            top_keys = _top_counts(df[x_col], 20).index
+            subset = df[df[x_col].isin(top_keys)]
+            agg_data = subset.groupby(x_col, observed=True, sort=False)[y_col].mean().reindex(top_keys)
             fig = px.bar(
-                x=agg_data.index, y=agg_data.values,
+                x=agg_data.index.to_numpy(), y=agg_data.to_numpy(),
                 title=f"Average {y_col} by {x_col}",
                 labels={'x': x_col, 'y': f'Average {y_col}'}
             )
@@ -203,11 +395,27 @@ class DataVisualizer:
     def create_time_series_plot(self, df: pd.DataFrame, date_col: str,
                                 value_col: str, group_col: str = None) -> go.Figure:
         """Create time series plot"""
+        # Long numeric series: send only the per-bucket min/max points to the browser
+        plot_df = df
+        if len(df) > 2 * LINE_BUCKETS and df[value_col].dtype.kind in 'iuf':
+            y = df[value_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            if group_col:
+                groups = list(df.groupby(group_col, sort=False).indices.values())
+                # groupby drops NaN keys; px.line still plots them, so decimate them as their own group
+                missing = np.flatnonzero(df[group_col].isna().to_numpy())
+                if len(missing):
+                    groups.append(missing)
+                keep = np.sort(np.concatenate([np.empty(0, dtype=np.intp)] +
+                                              [pos[_minmax_indices(y[pos])] for pos in groups]))
+            else:
+                keep = _minmax_indices(y)
+            plot_df = df.iloc[keep]
+
         if group_col:
-            fig = px.line(df, x=date_col, y=value_col, color=group_col,
+            fig = px.line(plot_df, x=date_col, y=value_col, color=group_col,
                           title=f"{value_col} over Time by {group_col}")
         else:
-            fig = px.line(df, x=date_col, y=value_col,
+            fig = px.line(plot_df, x=date_col, y=value_col,
                           title=f"{value_col} over Time")
 
         fig.update_layout(height=500)
@@ -215,6 +423,11 @@ class DataVisualizer:
 
     def suggest_visualizations(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Suggest appropriate visualizations based on data structure"""
+        # Widget interactions rerun the page with the same frame - build the list once
+        return self._per_frame('suggestions', df, lambda: self._build_suggestions(df))
+
+    def _build_suggestions(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Suggestion list for suggest_visualizations"""
         analysis = self.analyze_dataframe_for_viz(df)
         suggestions = []
 
@@ -260,17 +473,16 @@ class DataVisualizer:
             })
 
         # Scatter plots (if we have at least 2 numeric columns)
-        if len(analysis["numeric_columns"]) >= 2:
-            for i, x_col in enumerate(analysis["numeric_columns"][:2]):
-                for y_col in analysis["numeric_columns"][i + 1:i + 3]:
-                    suggestions.append({
-                        "type": "scatter",
-                        "title": f"🔍 {y_col} vs {x_col}",
-                        "description": f"Scatter plot showing relationship",
-                        "x_column": x_col,
-                        "y_column": y_col,
-                        "applicable": True
-                    })
+        # Every pair among the first 4 numeric columns (at most 6)
+        for x_col, y_col in combinations(analysis["numeric_columns"][:4], 2):
+            suggestions.append({
+                "type": "scatter",
+                "title": f"🔍 {y_col} vs {x_col}",
+                "description": f"Scatter plot showing relationship",
+                "x_column": x_col,
+                "y_column": y_col,
+                "applicable": True
+            })
 
         return suggestions
 
@@ -283,6 +495,12 @@ def display_visualization_interface(df: pd.DataFrame, visualizer: DataVisualizer
 
     st.subheader("📊 Data Visualization")
 
+    # Column lists for the selectboxes, built once per run
+    all_cols = df.columns.to_list()
+    optional_cols = [None, *all_cols]
+    numeric_cols = visualizer._numeric_cols(df).to_list()
+    hover_cols = all_cols[:5]
+
     # Get suggestions
     suggestions = visualizer.suggest_visualizations(df)
 
@@ -317,29 +535,29 @@ def display_visualization_interface(df: pd.DataFrame, visualizer: DataVisualizer
                                   ["Bar Chart", "Scatter Plot", "Distribution Plot"])
 
         if chart_type == "Bar Chart":
-            x_col = st.selectbox("X Column", df.columns)
-            y_col = st.selectbox("Y Column (Optional)", [None] + list(df.columns))
+            x_col = st.selectbox("X Column", all_cols)
+            y_col = st.selectbox("Y Column (Optional)", optional_cols)
 
             if st.button("Create Bar Chart"):
                 fig = visualizer.create_bar_chart(df, x_col, y_col)
                 st.plotly_chart(fig, use_container_width=True)
 
         elif chart_type == "Scatter Plot":
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
             if len(numeric_cols) >= 2:
                 x_col = st.selectbox("X Column", numeric_cols)
                 y_col = st.selectbox("Y Column", numeric_cols)
                 color_col = st.selectbox("Color Column (Optional)",
-                                         [None] + list(df.columns))
+                                         optional_cols)
 
                 if st.button("Create Scatter Plot"):
-                    fig = visualizer.create_scatter_plot(df, x_col, y_col, color_col)
+                    fig = visualizer.create_scatter_plot(df, x_col, y_col, color_col,
+                                                         hover_data=hover_cols)
                     st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Need at least 2 numeric columns for scatter plot")
 
         elif chart_type == "Distribution Plot":
-            column = st.selectbox("Column", df.columns)
+            column = st.selectbox("Column", all_cols)
 
             if st.button("Create Distribution Plot"):
                 fig = visualizer.create_distribution_plots(df, column)
@@ -350,35 +568,38 @@ def display_visualization_interface(df: pd.DataFrame, visualizer: DataVisualizer
         # AI suggestions
         st.subheader("💡 Suggested Visualizations")
 
+        # Generated figures survive reruns: button key -> (dataframe, figure).
+        # A new result frame invalidates them.
+        figures = st.session_state.setdefault('viz_figures', {})
+
+        def _generate(key: str, make):
+            if st.button("Generate", key=key):
+                figures[key] = (df, make())
+            cached = figures.get(key)
+            if cached is not None and cached[0] is df and cached[1] is not None:
+                st.plotly_chart(cached[1], use_container_width=True)
+
         for suggestion in suggestions[:6]:  # Limit to 6 suggestions
             with st.expander(suggestion["title"]):
                 st.write(suggestion["description"])
 
                 if suggestion["type"] == "summary_stats":
-                    if st.button("Generate", key=f"gen_{suggestion['type']}"):
-                        fig = visualizer.create_summary_stats_viz(df)
-                        if fig:
-                            st.plotly_chart(fig, use_container_width=True)
+                    _generate(f"gen_{suggestion['type']}",
+                              lambda: visualizer.create_summary_stats_viz(df))
 
                 elif suggestion["type"] == "distribution":
-                    if st.button("Generate", key=f"gen_{suggestion['type']}_{suggestion['column']}"):
-                        fig = visualizer.create_distribution_plots(df, suggestion["column"])
-                        if fig:
-                            st.plotly_chart(fig, use_container_width=True)
+                    _generate(f"gen_{suggestion['type']}_{suggestion['column']}",
+                              lambda: visualizer.create_distribution_plots(df, suggestion["column"]))
 
                 elif suggestion["type"] == "correlation":
-                    if st.button("Generate", key=f"gen_{suggestion['type']}"):
-                        fig = visualizer.create_correlation_heatmap(df)
-                        if fig:
-                            st.plotly_chart(fig, use_container_width=True)
+                    _generate(f"gen_{suggestion['type']}",
+                              lambda: visualizer.create_correlation_heatmap(df))
 
                 elif suggestion["type"] == "bar_chart":
-                    if st.button("Generate", key=f"gen_{suggestion['type']}_{suggestion['column']}"):
-                        fig = visualizer.create_bar_chart(df, suggestion["column"])
-                        st.plotly_chart(fig, use_container_width=True)
+                    _generate(f"gen_{suggestion['type']}_{suggestion['column']}",
+                              lambda: visualizer.create_bar_chart(df, suggestion["column"]))
 
                 elif suggestion["type"] == "scatter":
-                    if st.button("Generate",
-                                 key=f"gen_{suggestion['type']}_{suggestion['x_column']}_{suggestion['y_column']}"):
-                        fig = visualizer.create_scatter_plot(df, suggestion["x_column"], suggestion["y_column"])
-                        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+                    _generate(f"gen_{suggestion['type']}_{suggestion['x_column']}_{suggestion['y_column']}",
+                              lambda: visualizer.create_scatter_plot(df, suggestion["x_column"], suggestion["y_column"],
+                                                                     hover_data=hover_cols))
@@ -0,0 +1,55 @@
+import sqlite3
+import textwrap
+
+from helper.gen_sql_chunk import (
+    bulk_insert,
+    csv_to_sqlite_sample_data,
+    generate_create_table_sql,
+    optimize_dtypes,
+    read_csv_bytes,
+    write_dataframe_to_sqlite,
+)
+
+
+def _load(df, table_name="data"):
+    conn = sqlite3.connect(":memory:")
+    conn.execute(generate_create_table_sql(df, table_name))
+    bulk_insert(conn, df, table_name)
+    return conn
+
+
+def test_bulk_insert_binds_datetime_csv_columns():
+    df = read_csv_bytes(b"id,ts\n1,2024-06-26 23:59:37\n2,\n")
+    conn = _load(df)
+
+    rows = conn.execute('SELECT id, ts FROM "data" ORDER BY id').fetchall()
+    assert rows == [(1, "2024-06-26 23:59:37"), (2, None)]
+
+
+def test_csv_with_temporal_columns_round_trips_to_sqlite(tmp_path):
+    content = (
+        b"id,ts,day,at\n"
+        b"1,2024-06-26 23:59:37,2024-06-26,12:30:00\n"
+        b"2,2024-06-27 08:00:00,2024-06-27,08:15:30\n"
+        b"3,,,\n"
+    )
+    db_path = tmp_path / "upload.db"
+
+    write_dataframe_to_sqlite(optimize_dtypes(read_csv_bytes(content)), db_path, "data")
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('SELECT id, ts, day, at FROM "data" ORDER BY id').fetchall()
+    assert rows == [
+        (1, "2024-06-26 23:59:37", "2024-06-26", "12:30:00"),
+        (2, "2024-06-27 08:00:00", "2024-06-27", "08:15:30"),
+        (3, None, None, None),
+    ]
+
+
+def test_generated_sample_data_code_compiles(tmp_path):
+    csv_path = tmp_path / "sample.csv"
+    csv_path.write_text('id,name,score\n1,"O\'Brien",1.5\n2,"two\nlines",\n3,plain,3.25\n')
+
+    code = csv_to_sqlite_sample_data(str(csv_path), chunk_size=2)
+
+    compile(textwrap.dedent(code), "<sample_data>", "exec")
@@ -0,0 +1,47 @@
+import pytest
+
+from helper.query_routing import is_read_query, is_volatile_query
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM employees",
+    "WITH t AS (SELECT 1) SELECT * FROM t",
+    "PRAGMA user_version",
+    "PRAGMA table_info(employees)",
+    "pragma main.index_list('employees')",
+])
+def test_read_queries(query):
+    assert is_read_query(query)
+
+
+@pytest.mark.parametrize("query", [
+    "INSERT INTO employees VALUES (1)",
+    "WITH t AS (SELECT 1) DELETE FROM employees",
+    "PRAGMA user_version=3",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode(WAL)",
+    "PRAGMA main.cache_size(-2000)",
+])
+def test_write_queries(query):
+    assert not is_read_query(query)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM employees ORDER BY RANDOM() LIMIT 10",
+    "SELECT * FROM employees ORDER BY RAND() LIMIT 10",
+    "SELECT TOP 10 * FROM employees ORDER BY NEWID()",
+    "SELECT now()",
+    "SELECT CURRENT_TIMESTAMP",
+    "SELECT datetime('now')",
+])
+def test_volatile_queries(query):
+    assert is_volatile_query(query)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM employees",
+    "SELECT operand, current_value FROM random_numbers",
+    "SELECT * FROM events WHERE known_at > '2024-01-01'",
+])
+def test_cacheable_queries(query):
+    assert not is_volatile_query(query)